@@ -1,10 +1,15 @@
-import os, time, base64, hashlib, secrets, asyncio, json
+import os, re, time, base64, hashlib, secrets, asyncio, json, random, math, bisect
+from collections import deque, OrderedDict, Counter
+from datetime import datetime, timezone
+from itertools import chain
+from operator import itemgetter
+import heapq
 from typing import Optional, Dict, Any
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from starlette.middleware.sessions import SessionMiddleware
 
 # --- BEGIN PATCH: proxy headers safe import ---
@@ -23,6 +28,12 @@ except Exception:
 
 import httpx
 import redis.asyncio as redis
+from itsdangerous import Signer, BadSignature
+
+import codec
+from codec import FastJSONResponse
+from jsonapi import Document, Sparse, projection
+from schemas import PeopleResult, PlansResult, ServiceTypeMatches, ServiceTypesResult
 
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
 if PUBLIC_BASE_URL:
@@ -42,6 +53,67 @@ app.add_middleware(CORSMiddleware, allow_origins=[o.strip() for o in origins],
 SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "change-me")
 app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET_KEY, same_site="lax", https_only=True)
 
+# ETag / Cache-Control on /pco/* GETs: a strong ETag over the response body, 304 for a matching
+# If-None-Match, and a per-route Cache-Control (public only in single-tenant mode, where the data
+# isn't keyed by caller, and never for personal data; Vary covers the tenant credentials either way)
+_CACHE_CONTROL_MAX_AGE = {"/pco/services/service-types": 300, "/pco/services/types": 300,
+                          "/pco/services/service-types/resolve": 300, "/pco/services/types/resolve": 300,
+                          "/pco/services/plans": 60, "/pco/services/plan": 60, "/pco/people/find": 30}
+# Names, emails and phone numbers (plan detail includes team_members.person): no shared caches or CDNs
+_PRIVATE_ROUTES = {"/pco/people/find", "/pco/services/plan"}
+
+_TENANT_VARY = ("Cookie", "X-API-Key", "X-Tenant-Token")
+
+def _cache_control(path: str) -> str:
+    max_age = _CACHE_CONTROL_MAX_AGE.get(path)
+    private = MULTI_TENANT or path in _PRIVATE_ROUTES
+    return f"{'private' if private else 'public'}, max-age={max_age}" if max_age else "no-store"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class ETagMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith("/pco/"):
+            return await self.app(scope, receive, send)
+        start = None; chunks = []
+
+        async def buffer(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if not any(k.lower() == b"content-length" for k, _ in message["headers"]):
+                    return await send(message)  # streamed (no length): pass through unbuffered, no ETag
+                start = message; return
+            if message["type"] != "http.response.body" or start is None: return await send(message)
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"): return
+            await self._finish(scope, start, b"".join(chunks), send)
+
+        await self.app(scope, receive, buffer)
+
+    async def _finish(self, scope, start, body: bytes, send):
+        if start["status"] != 200:
+            await send(start); return await send({"type": "http.response.body", "body": body})
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        cache_control = _cache_control(scope["path"])
+        vary = [t.strip() for k, v in start["headers"] if k.lower() == b"vary" for t in v.decode().split(",")]
+        vary += [t for t in _TENANT_VARY if t not in vary]
+        headers = [(k, v) for k, v in start["headers"] if k.lower() not in (b"etag", b"cache-control", b"vary")]
+        headers += [(b"etag", etag.encode()), (b"cache-control", cache_control.encode()), (b"vary", ", ".join(vary).encode())]
+        if_none_match = next((v.decode() for k, v in scope["headers"] if k == b"if-none-match"), None)
+        if if_none_match and _etag_matches(if_none_match, etag):
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+            await send({**start, "status": 304, "headers": headers})
+            return await send({"type": "http.response.body", "body": b""})
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+app.add_middleware(ETagMiddleware)
+
 # OAuth config
 PCO_CLIENT_ID = os.getenv("PCO_CLIENT_ID")
 PCO_CLIENT_SECRET = os.getenv("PCO_CLIENT_SECRET")
@@ -51,10 +123,93 @@ PCO_SCOPES = os.getenv("PCO_SCOPES", "people services")
 AUTH_URL = "https://api.planningcenteronline.com/oauth/authorize"
 TOKEN_URL = "https://api.planningcenteronline.com/oauth/token"
 
+# Tenancy: with MULTI_TENANT on, each connected Planning Center org is its own tenant ("org-<id>")
+# and callers identify it by API key (X-API-Key), a signed X-Tenant-Token, or their session.
+MULTI_TENANT = (os.getenv("MULTI_TENANT") or "").lower() in ("1", "true", "yes")
+TENANT_SIGNING_SECRET = os.getenv("TENANT_SIGNING_SECRET")
+PCO_TENANT_MAX_CONCURRENCY = int(os.getenv("PCO_TENANT_MAX_CONCURRENCY", "10"))
+
 # Defaults
 DEFAULT_SERVICE_TYPE_ID = os.getenv("DEFAULT_SERVICE_TYPE_ID")
 DEFAULT_SERVICE_TYPE_NAME = os.getenv("DEFAULT_SERVICE_TYPE_NAME")
 
+# Outbound HTTP (one pooled client for the app lifetime)
+PCO_HTTP_TIMEOUT = float(os.getenv("PCO_HTTP_TIMEOUT", "25"))
+PCO_HTTP_CONNECT_TIMEOUT = float(os.getenv("PCO_HTTP_CONNECT_TIMEOUT", "5"))
+PCO_TOKEN_TIMEOUT = float(os.getenv("PCO_TOKEN_TIMEOUT", "20"))
+PCO_HTTP_MAX_CONNECTIONS = int(os.getenv("PCO_HTTP_MAX_CONNECTIONS", "100"))
+PCO_HTTP_MAX_KEEPALIVE = int(os.getenv("PCO_HTTP_MAX_KEEPALIVE", "20"))
+PCO_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("PCO_HTTP_KEEPALIVE_EXPIRY", "30"))
+# Opt-in: multiplex concurrent upstream calls over a few HTTP/2 connections (negotiated via ALPN)
+PCO_HTTP2 = (os.getenv("PCO_HTTP2") or "").lower() in ("1", "true", "yes")
+http_client: Optional[httpx.AsyncClient] = None
+
+# Client-side rate limiting (defaults match PCO's 100 requests / 20s until headers say otherwise)
+PCO_RATE_LIMIT_DEFAULT = int(os.getenv("PCO_RATE_LIMIT_DEFAULT", "100"))
+PCO_RATE_PERIOD_DEFAULT = int(os.getenv("PCO_RATE_PERIOD_DEFAULT", "20"))
+PCO_RATE_LIMIT_HEADROOM = float(os.getenv("PCO_RATE_LIMIT_HEADROOM", "0.9"))
+PCO_RATE_LIMIT_MAX_WAIT = float(os.getenv("PCO_RATE_LIMIT_MAX_WAIT", "30"))
+
+# Retries for idempotent upstream GETs (decorrelated jitter, capped by a process-wide budget)
+PCO_RETRY_MAX = int(os.getenv("PCO_RETRY_MAX", "3"))
+PCO_RETRY_BASE_DELAY = float(os.getenv("PCO_RETRY_BASE_DELAY", "0.2"))
+PCO_RETRY_MAX_DELAY = float(os.getenv("PCO_RETRY_MAX_DELAY", "10"))
+PCO_RETRY_BUDGET_RATIO = float(os.getenv("PCO_RETRY_BUDGET_RATIO", "0.2"))
+PCO_RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("PCO_RETRY_BUDGET_MIN_PER_SEC", "1"))
+
+# Circuit breaker per upstream host + route family (state shared through Redis)
+PCO_BREAKER_WINDOW = float(os.getenv("PCO_BREAKER_WINDOW", "30"))
+PCO_BREAKER_MIN_CALLS = int(os.getenv("PCO_BREAKER_MIN_CALLS", "10"))
+PCO_BREAKER_FAILURE_RATIO = float(os.getenv("PCO_BREAKER_FAILURE_RATIO", "0.5"))
+PCO_BREAKER_SLOW_SECONDS = float(os.getenv("PCO_BREAKER_SLOW_SECONDS", "5"))
+PCO_BREAKER_SLOW_RATIO = float(os.getenv("PCO_BREAKER_SLOW_RATIO", "0.5"))
+PCO_BREAKER_OPEN_SECONDS = float(os.getenv("PCO_BREAKER_OPEN_SECONDS", "30"))
+PCO_BREAKER_HALF_OPEN_PROBES = int(os.getenv("PCO_BREAKER_HALF_OPEN_PROBES", "3"))
+PCO_BREAKER_SYNC_SECONDS = float(os.getenv("PCO_BREAKER_SYNC_SECONDS", "1"))
+
+# In-process token cache in front of Redis (upper bound on how long an entry is trusted without Redis)
+PCO_TOKEN_CACHE_TTL = float(os.getenv("PCO_TOKEN_CACHE_TTL", "300"))
+
+# Single-flight token refresh (Redis lock lease, and how long other instances wait for the holder)
+PCO_REFRESH_LOCK_SECONDS = float(os.getenv("PCO_REFRESH_LOCK_SECONDS", "30"))
+PCO_REFRESH_WAIT_SECONDS = float(os.getenv("PCO_REFRESH_WAIT_SECONDS", "10"))
+
+# Background refresher: refresh tokens this many seconds before expiry, polling on a jittered interval
+PCO_REFRESH_AHEAD_SECONDS = float(os.getenv("PCO_REFRESH_AHEAD_SECONDS", "600"))
+PCO_REFRESHER_INTERVAL = float(os.getenv("PCO_REFRESHER_INTERVAL", "30"))
+PCO_REFRESHER_CONCURRENCY = int(os.getenv("PCO_REFRESHER_CONCURRENCY", "10"))
+PCO_REFRESHER_ENABLED = (os.getenv("PCO_REFRESHER_ENABLED") or "true").lower() in ("1", "true", "yes")
+
+# Fuzzy (typo-tolerant) name matching: minimum similarity in [0, 1] and how many fuzzy matches to return
+PCO_FUZZY_MIN_SCORE = float(os.getenv("PCO_FUZZY_MIN_SCORE", "0.45"))
+PCO_FUZZY_LIMIT = int(os.getenv("PCO_FUZZY_LIMIT", "5"))
+PCO_FUZZY_POSTINGS_BUDGET = int(os.getenv("PCO_FUZZY_POSTINGS_BUDGET", "3000"))
+
+# People mirror (opt-in per tenant): sync cadence, full-resync cadence, page cap, and how long an
+# instance trusts its in-memory index before re-checking the mirror version in Redis
+PCO_PEOPLE_SYNC_INTERVAL = float(os.getenv("PCO_PEOPLE_SYNC_INTERVAL", "300"))
+PCO_PEOPLE_FULL_SYNC_INTERVAL = float(os.getenv("PCO_PEOPLE_FULL_SYNC_INTERVAL", "86400"))
+PCO_PEOPLE_MIRROR_MAX_PAGES = int(os.getenv("PCO_PEOPLE_MIRROR_MAX_PAGES", "500"))
+PCO_PEOPLE_MIRROR_CHECK_SECONDS = float(os.getenv("PCO_PEOPLE_MIRROR_CHECK_SECONDS", "5"))
+
+# find_person response cache: seconds a lookup is reused, and in-process LRU size (Redis holds the rest)
+PCO_PEOPLE_FIND_TTL = float(os.getenv("PCO_PEOPLE_FIND_TTL", "30"))
+PCO_PEOPLE_FIND_CACHE_MAX = int(os.getenv("PCO_PEOPLE_FIND_CACHE_MAX", "2000"))
+
+# Conditional requests (If-None-Match / If-Modified-Since) for service types and plan detail, and how long
+# stored validators and bodies are kept in Redis
+PCO_CONDITIONAL_REQUESTS = os.getenv("PCO_CONDITIONAL_REQUESTS", "true").lower() in ("1", "true", "yes")
+PCO_VALIDATOR_TTL = float(os.getenv("PCO_VALIDATOR_TTL", "604800"))
+
+# Concurrent page fetches per paginated collection
+PCO_PAGINATION_CONCURRENCY = int(os.getenv("PCO_PAGINATION_CONCURRENCY", "4"))
+
+# Service-type catalog cache: fresh for PCO_CATALOG_TTL, then served stale (while one refresh runs)
+# for up to PCO_CATALOG_STALE_TTL more
+PCO_CATALOG_TTL = float(os.getenv("PCO_CATALOG_TTL", "300"))
+PCO_CATALOG_STALE_TTL = float(os.getenv("PCO_CATALOG_STALE_TTL", "86400"))
+PCO_CATALOG_MAX_PAGES = int(os.getenv("PCO_CATALOG_MAX_PAGES", "20"))
+
 # Redis
 REDIS_URL = os.getenv("REDIS_URL")
 redis_client: Optional[redis.Redis] = None
@@ -72,14 +227,101 @@ async def _redis_startup():
         # Fail fast to avoid subtle runtime 503s
         raise RuntimeError(f"Cannot connect to Redis at {REDIS_URL}: {e}")
 
-@app.on_event("shutdown")
-async def _redis_shutdown():
+async def _redis_shutdown():  # registered last, in _close_clients
     if redis_client:
         await redis_client.aclose()
 
+def _new_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=PCO_HTTP_MAX_CONNECTIONS, max_keepalive_connections=PCO_HTTP_MAX_KEEPALIVE,
+                          keepalive_expiry=PCO_HTTP_KEEPALIVE_EXPIRY)
+    timeout = httpx.Timeout(PCO_HTTP_TIMEOUT, connect=PCO_HTTP_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=PCO_HTTP2)
+
+def _http() -> httpx.AsyncClient:
+    # Normally created by the startup hook; created lazily if a call lands before it ran
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = _new_http_client()
+    return http_client
+
+@app.on_event("startup")
+async def _http_startup():
+    global http_client
+    http_client = _new_http_client()
+
+async def _http_shutdown():  # registered last, in _close_clients
+    global http_client
+    if http_client:
+        await http_client.aclose()
+        http_client = None
+
+# ---- Tenant resolution ----
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_API_KEY_CACHE_TTL = 60.0
+_API_KEY_CACHE_MAX = 10_000
+_api_key_cache: "OrderedDict[str, tuple]" = OrderedDict()  # sha256(key) -> (tenant, cached_until)
+_tenant_signer = Signer(TENANT_SIGNING_SECRET, salt="pco-tenant") if TENANT_SIGNING_SECRET else None
+
+def _api_key_digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+async def _tenant_for_api_key(api_key: str) -> Optional[str]:
+    digest = _api_key_digest(api_key); hit = _api_key_cache.get(digest)
+    if hit and hit[1] > time.monotonic():
+        _api_key_cache.move_to_end(digest); return hit[0]
+    if not redis_client:
+        raise HTTPException(status_code=503, detail="Redis not configured (REDIS_URL missing).")
+    tenant = await redis_client.get(f"pco:apikey:{digest}")
+    if tenant:
+        _api_key_cache[digest] = (tenant, time.monotonic() + _API_KEY_CACHE_TTL); _api_key_cache.move_to_end(digest)
+        while len(_api_key_cache) > _API_KEY_CACHE_MAX: _api_key_cache.popitem(last=False)
+    return tenant
+
+async def _issue_api_key(tenant: str) -> str:
+    api_key = secrets.token_urlsafe(32)
+    await redis_client.set(f"pco:apikey:{_api_key_digest(api_key)}", tenant)
+    return api_key
+
+async def _tenant(request: Request) -> str:
+    # Single-tenant deployments ignore tenant credentials entirely (a GPT Action may still send its X-API-Key)
+    if not MULTI_TENANT: return "default"
+    signed = request.headers.get("X-Tenant-Token")
+    if signed and _tenant_signer:
+        try: tenant = _tenant_signer.unsign(signed).decode()
+        except BadSignature: raise HTTPException(status_code=401, detail="Invalid X-Tenant-Token.")
+        if _TENANT_RE.match(tenant): return tenant
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        tenant = await _tenant_for_api_key(api_key)
+        if not tenant: raise HTTPException(status_code=401, detail="Unknown API key.")
+        return tenant
+    tenant = request.session.get("tenant")
+    if tenant and _TENANT_RE.match(tenant): return tenant
+    raise HTTPException(status_code=401, detail="Tenant not identified. Send X-API-Key (issued by /auth/callback) or X-Tenant-Token.")
+
+# Per-tenant cap on in-flight upstream calls so one org can't take the whole shared connection pool
+_tenant_slots: Dict[str, list] = {}  # tenant -> [Semaphore, users]
+
+class _TenantSlot:
+    def __init__(self, tenant: str): self.tenant = tenant
+
+    async def __aenter__(self):
+        slot = _tenant_slots.get(self.tenant)
+        if slot is None: slot = _tenant_slots[self.tenant] = [asyncio.Semaphore(PCO_TENANT_MAX_CONCURRENCY), 0]
+        slot[1] += 1
+        try: await slot[0].acquire()
+        except BaseException:
+            self._release_user(slot); raise
+        self._slot = slot
+
+    async def __aexit__(self, *exc):
+        self._slot[0].release(); self._release_user(self._slot)
+
+    def _release_user(self, slot: list):
+        slot[1] -= 1
+        if slot[1] == 0 and _tenant_slots.get(self.tenant) is slot: del _tenant_slots[self.tenant]
+
 # Helpers for token storage in Redis
-def _tenant(request: Request) -> str:
-    return "default"
 
 async def _redis_get_token(tenant: str) -> Optional[dict]:
     if not redis_client:
@@ -87,15 +329,96 @@ async def _redis_get_token(tenant: str) -> Optional[dict]:
     raw = await redis_client.get(f"pco:{tenant}:token")
     return json.loads(raw) if raw else None
 
-async def _redis_set_token(tenant: str, token: dict, ttl_seconds: Optional[int] = None):
+# Write the token while KEYS[1] (the refresh lock) still holds our fencing token (returns 1). Past the
+# lease, still write it if the stored entry holds the refresh token we consumed (returns 2): PCO has
+# rotated it, so ours is the only valid one. Anything else means a newer token was stored (returns 0).
+_FENCED_SET_LUA = """
+local held = redis.call('GET', KEYS[1]) == ARGV[1]
+if not held then
+  local cur = redis.call('GET', KEYS[2])
+  if not cur or ARGV[4] == '' or cjson.decode(cur)['refresh_token'] ~= ARGV[4] then return 0 end
+end
+if tonumber(ARGV[3]) > 0 then redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3]) else redis.call('SET', KEYS[2], ARGV[2]) end
+if held then return 1 end
+return 2
+"""
+token_refresh_counters = {"late_writes": 0, "superseded": 0}
+
+async def _redis_set_token(tenant: str, token: dict, ttl_seconds: Optional[int] = None, fence: Optional[int] = None,
+                           consumed: Optional[str] = None) -> bool:
     if not redis_client:
         raise HTTPException(status_code=503, detail="Redis not configured (REDIS_URL missing).")
     key = f"pco:{tenant}:token"
     val = json.dumps(token)
-    if ttl_seconds and ttl_seconds > 0:
+    if fence is not None:
+        # A newer lock holder exists: don't let this (older) refresh overwrite its result
+        ok = await redis_client.eval(_FENCED_SET_LUA, 2, f"pco:{tenant}:refresh:lock", key, str(fence), val,
+                                     int(ttl_seconds or 0), consumed or "")
+        if not ok: return False
+        if ok == 2: token_refresh_counters["late_writes"] += 1
+    elif ttl_seconds and ttl_seconds > 0:
         await redis_client.setex(key, ttl_seconds, val)
     else:
         await redis_client.set(key, val)
+    _token_cache_put(tenant, token)
+    if token.get("expires_at") and token.get("refresh_token"):
+        await redis_client.zadd(TOKEN_EXPIRY_ZSET, {tenant: token["expires_at"]})
+    else:
+        await redis_client.zrem(TOKEN_EXPIRY_ZSET, tenant)
+    await redis_client.publish(TOKEN_INVALIDATE_CHANNEL, f"{_INSTANCE_ID}:{tenant}")
+    return True
+
+# Refreshable tenants scored by expires_at; the background refresher reads due tenants from here
+TOKEN_EXPIRY_ZSET = "pco:token:expiry"
+
+# In-process token cache: decoded entries per tenant, trusted until shortly before the refresh window.
+# Writes on any instance publish on TOKEN_INVALIDATE_CHANNEL so the others drop their copy.
+TOKEN_INVALIDATE_CHANNEL = "pco:token:invalidate"
+_INSTANCE_ID = secrets.token_hex(8)
+_token_cache: Dict[str, tuple] = {}  # tenant -> (entry, valid_until)
+_token_listener: Optional[asyncio.Task] = None
+
+def _token_cache_put(tenant: str, entry: dict):
+    valid_until = time.time() + PCO_TOKEN_CACHE_TTL
+    if entry.get("expires_at"): valid_until = min(valid_until, entry["expires_at"] - 60)
+    if valid_until > time.time(): _token_cache[tenant] = (dict(entry), valid_until)
+    else: _token_cache.pop(tenant, None)
+
+def _token_cache_get(tenant: str) -> Optional[dict]:
+    hit = _token_cache.get(tenant)
+    if not hit: return None
+    if hit[1] <= time.time():
+        _token_cache.pop(tenant, None); return None
+    return dict(hit[0])
+
+async def _listen_token_invalidations():
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(TOKEN_INVALIDATE_CHANNEL)
+            _token_cache.clear()  # anything published while we weren't subscribed is unknown
+            async for msg in pubsub.listen():
+                if msg.get("type") != "message": continue
+                origin, _, tenant = str(msg.get("data")).partition(":")
+                if origin != _INSTANCE_ID: _token_cache.pop(tenant, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _token_cache.clear(); await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+@app.on_event("startup")
+async def _token_cache_startup():
+    global _token_listener
+    if redis_client: _token_listener = asyncio.create_task(_listen_token_invalidations())
+
+@app.on_event("shutdown")
+async def _token_cache_shutdown():
+    if _token_listener:
+        _token_listener.cancel()
+        try: await _token_listener
+        except asyncio.CancelledError: pass
 
 def jsonapi_headers_bearer(token: str) -> dict:
     return {
@@ -104,53 +427,635 @@ def jsonapi_headers_bearer(token: str) -> dict:
         "Content-Type": "application/vnd.api+json",
     }
 
-async def pco_get(url: str, headers: dict, params: Optional[dict] = None, max_retries: int = 3):
-    attempt = 0
-    async with httpx.AsyncClient(timeout=25) as client:
+# ---- Rate limiting ----
+# Token bucket per tenant: capacity = limit * headroom, refilled evenly over the period.
+# Both scripts refill from Redis TIME so every instance shares one clock and one bucket.
+_RATE_REFILL_LUA = """
+local h = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'limit', 'period')
+local t = redis.call('TIME'); local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local limit = tonumber(h[3]) or tonumber(ARGV[1]); local period = tonumber(h[4]) or tonumber(ARGV[2])
+local cap = math.max(1, math.floor(limit * tonumber(ARGV[3])))
+local rate = cap / (period * 1000)
+local tokens = tonumber(h[1]) or cap
+tokens = math.min(cap, tokens + math.max(0, now - (tonumber(h[2]) or now)) * rate)
+"""
+_RATE_ACQUIRE_LUA = _RATE_REFILL_LUA + """
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = math.ceil((1 - tokens) / rate) end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], period * 2000)
+return wait
+"""
+_RATE_OBSERVE_LUA = _RATE_REFILL_LUA + """
+if ARGV[4] ~= '' then limit = tonumber(ARGV[4]) end
+if ARGV[5] ~= '' then period = tonumber(ARGV[5]) end
+cap = math.max(1, math.floor(limit * tonumber(ARGV[3])))
+if ARGV[6] ~= '' then tokens = math.min(tokens, math.max(0, cap - tonumber(ARGV[6]))) end
+redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(tokens, cap)), 'ts', now, 'limit', limit, 'period', period)
+redis.call('PEXPIRE', KEYS[1], period * 2000)
+return 0
+"""
+
+def _int_header(response: httpx.Response, name: str) -> Optional[int]:
+    try: return int(response.headers[name])
+    except (KeyError, ValueError): return None
+
+class RateLimiter:
+    """Paces outbound PCO calls per tenant, learning limits from X-PCO-API-Request-Rate-* headers.
+
+    Uses Redis (shared across workers) when configured, otherwise an in-process bucket.
+    """
+    def __init__(self):
+        self._local: Dict[str, dict] = {}
+        self._scripts_for = None; self._acquire = self._observe = None
+
+    def _scripts(self):
+        if self._scripts_for is not redis_client:
+            self._acquire = redis_client.register_script(_RATE_ACQUIRE_LUA)
+            self._observe = redis_client.register_script(_RATE_OBSERVE_LUA)
+            self._scripts_for = redis_client
+        return self._acquire, self._observe
+
+    def _defaults(self):
+        return [PCO_RATE_LIMIT_DEFAULT, PCO_RATE_PERIOD_DEFAULT, PCO_RATE_LIMIT_HEADROOM]
+
+    def _local_bucket(self, tenant: str) -> dict:
+        b = self._local.get(tenant); now = time.monotonic()
+        if b is None:
+            b = self._local[tenant] = {"limit": PCO_RATE_LIMIT_DEFAULT, "period": PCO_RATE_PERIOD_DEFAULT, "ts": now}
+            b["tokens"] = self._cap(b)
+        b["tokens"] = min(self._cap(b), b["tokens"] + (now - b["ts"]) * self._cap(b) / b["period"]); b["ts"] = now
+        return b
+
+    @staticmethod
+    def _cap(b: dict) -> int:
+        return max(1, int(b["limit"] * PCO_RATE_LIMIT_HEADROOM))
+
+    async def _try_acquire(self, tenant: str) -> float:
+        """Take one token; returns 0, or the seconds to wait before one is available."""
+        if redis_client:
+            try:
+                acquire, _ = self._scripts()
+                return int(await acquire(keys=[f"pco:{tenant}:ratelimit"], args=self._defaults())) / 1000
+            except redis.RedisError:
+                pass  # degrade to per-process pacing rather than failing the request
+        b = self._local_bucket(tenant)
+        if b["tokens"] >= 1:
+            b["tokens"] -= 1; return 0.0
+        return (1 - b["tokens"]) * b["period"] / self._cap(b)
+
+    async def acquire(self, tenant: str):
+        # Never wait longer than PCO_RATE_LIMIT_MAX_WAIT; past that, send anyway and let 429 handling take over
+        deadline = time.monotonic() + PCO_RATE_LIMIT_MAX_WAIT
         while True:
-            r = await client.get(url, headers=headers, params=params)
-            if r.status_code != 429 or attempt >= max_retries:
-                return r
-            retry_after = int(r.headers.get("Retry-After", "1"))
-            await asyncio.sleep(retry_after)
-            attempt += 1
+            wait = await self._try_acquire(tenant)
+            remaining = deadline - time.monotonic()
+            if wait <= 0 or remaining <= 0: return
+            await asyncio.sleep(min(wait, remaining))
+
+    async def observe(self, tenant: str, response: httpx.Response):
+        limit = _int_header(response, "X-PCO-API-Request-Rate-Limit")
+        period = _int_header(response, "X-PCO-API-Request-Rate-Period")
+        count = _int_header(response, "X-PCO-API-Request-Rate-Count")
+        if response.status_code == 429 and limit is not None: count = limit  # server says we're out
+        if limit is None and period is None and count is None: return
+        if redis_client:
+            try:
+                _, observe = self._scripts()
+                args = self._defaults() + ["" if v is None else v for v in (limit, period, count)]
+                await observe(keys=[f"pco:{tenant}:ratelimit"], args=args); return
+            except redis.RedisError:
+                pass
+        b = self._local_bucket(tenant)
+        if limit: b["limit"] = limit
+        if period: b["period"] = period
+        b["tokens"] = min(b["tokens"], self._cap(b))
+        if count is not None: b["tokens"] = min(b["tokens"], max(0, self._cap(b) - count))
+
+rate_limiter = RateLimiter()
+
+# ---- Retries ----
+class RetryPolicy:
+    """Which upstream GET failures to retry, and how long to back off (decorrelated jitter)."""
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+    def __init__(self, max_retries: int = PCO_RETRY_MAX, base_delay: float = PCO_RETRY_BASE_DELAY,
+                 max_delay: float = PCO_RETRY_MAX_DELAY):
+        self.max_retries = max_retries; self.base_delay = base_delay; self.max_delay = max_delay
+
+    def retryable(self, response: Optional[httpx.Response] = None, error: Optional[Exception] = None) -> bool:
+        if error is not None: return isinstance(error, httpx.TransportError)
+        return response is not None and response.status_code in self.RETRY_STATUSES
+
+    def next_delay(self, prev_delay: float, retry_after: Optional[float] = None) -> float:
+        # sleep = min(cap, uniform(base, prev * 3)); a Retry-After is a floor with jitter on top
+        delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, prev_delay) * 3))
+        if retry_after is not None: delay = retry_after + random.uniform(0, delay)
+        return delay
+
+class RetryBudget:
+    """Process-wide cap on retries: each request earns `ratio` of a retry, plus a small per-second floor."""
+    def __init__(self, ratio: float = PCO_RETRY_BUDGET_RATIO, min_per_sec: float = PCO_RETRY_BUDGET_MIN_PER_SEC,
+                 max_balance: float = 100.0):
+        self.ratio = ratio; self.min_per_sec = min_per_sec; self.max_balance = max_balance
+        self._balance = max_balance * ratio; self._ts = time.monotonic()
+        self.counters = {"requests": 0, "retries": 0, "budget_exhausted": 0, "gave_up": 0, "retries_by_reason": {}}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self.max_balance, self._balance + (now - self._ts) * self.min_per_sec); self._ts = now
+
+    def record_request(self):
+        self._refill(); self.counters["requests"] += 1
+        self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_spend(self, reason: str) -> bool:
+        self._refill()
+        if self._balance < 1:
+            self.counters["budget_exhausted"] += 1; return False
+        self._balance -= 1; self.counters["retries"] += 1
+        by_reason = self.counters["retries_by_reason"]; by_reason[reason] = by_reason.get(reason, 0) + 1
+        return True
+
+    def snapshot(self) -> dict:
+        self._refill()
+        return {**self.counters, "retries_by_reason": dict(self.counters["retries_by_reason"]),
+                "balance": round(self._balance, 2)}
+
+retry_policy = RetryPolicy()
+retry_budget = RetryBudget()
+
+def _upstream_unreachable(url: str, error: httpx.TransportError, retry_after: float) -> HTTPException:
+    # Same shape as the breaker's fail-fast answer: 504 when PCO timed out, 502 when it couldn't be reached
+    status = 504 if isinstance(error, httpx.TimeoutException) else 502
+    return HTTPException(status_code=status, detail=f"Planning Center ({urlsplit(url).path}) unreachable: {type(error).__name__}",
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    try: return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError): return None
+
+# ---- Circuit breaker ----
+class CircuitBreaker:
+    """Closed -> open on error-rate or slow-call-rate over a rolling window; open -> half-open after a cool-down.
+
+    Opening is published to Redis (pco:breaker:{key}) so every instance fails fast together, and the
+    half-open probe allowance and probe successes are counted there too: only a few probes go out
+    fleet-wide, and once enough of them succeed every instance closes.
+    """
+    def __init__(self, key: str):
+        self.key = key; self.state = "closed"; self.opened_until = 0.0
+        self._calls: deque = deque()  # (monotonic ts, failed, slow)
+        self._probes = 0; self._probe_successes = 0; self._synced_at = 0.0
+        self.counters = {"rejected": 0, "opened": 0, "closed": 0}
+
+    @property
+    def _redis_key(self) -> str:
+        return f"pco:breaker:{self.key}"
+
+    def _trip(self, until: Optional[float] = None):
+        if self.state != "open": self.counters["opened"] += 1
+        self.state = "open"; self.opened_until = until or time.time() + PCO_BREAKER_OPEN_SECONDS
+        self._calls.clear(); self._probes = self._probe_successes = 0
+
+    def _close(self):
+        if self.state != "closed": self.counters["closed"] += 1
+        self.state = "closed"; self._calls.clear(); self._probes = self._probe_successes = 0
+
+    async def _sync(self):
+        # Adopt the state the fleet has published: open from another instance's trip, closed once enough
+        # probes succeeded anywhere (polled at most every PCO_BREAKER_SYNC_SECONDS)
+        now = time.monotonic()
+        if not redis_client or now - self._synced_at < PCO_BREAKER_SYNC_SECONDS: return
+        self._synced_at = now
+        try: raw, ok = await redis_client.mget(self._redis_key, f"{self._redis_key}:probe_ok")
+        except redis.RedisError: return
+        if raw and float(raw) > time.time():
+            # A half-open instance must adopt a peer's fresh trip too, or its probes outlive that trip
+            if self.state != "open" or float(raw) > self.opened_until: self._trip(float(raw))
+        elif self.state != "closed" and int(ok or 0) >= PCO_BREAKER_HALF_OPEN_PROBES:
+            self._close()
+
+    async def _fleet_open_until(self) -> Optional[float]:
+        # Unthrottled read of the published trip, for decisions a stale _sync could get wrong
+        if not redis_client: return None
+        try: raw = await redis_client.get(self._redis_key)
+        except redis.RedisError: return None
+        return float(raw) if raw and float(raw) > time.time() else None
+
+    async def _publish_open(self):
+        if not redis_client: return
+        try:
+            await redis_client.set(self._redis_key, str(self.opened_until), px=max(1, int((self.opened_until - time.time()) * 1000)))
+            await redis_client.delete(f"{self._redis_key}:probes", f"{self._redis_key}:probe_ok")
+        except redis.RedisError: pass
+
+    async def _record_probe_success(self) -> int:
+        # Fleet-wide count of good probes since the last trip; local when Redis is unavailable
+        self._probe_successes += 1
+        if not redis_client: return self._probe_successes
+        try:
+            okey = f"{self._redis_key}:probe_ok"
+            n = await redis_client.incr(okey)
+            if n == 1: await redis_client.pexpire(okey, int(PCO_BREAKER_OPEN_SECONDS * 1000))
+            return n
+        except redis.RedisError:
+            return self._probe_successes
+
+    async def _claim_probe(self) -> bool:
+        if self._probes >= PCO_BREAKER_HALF_OPEN_PROBES: return False
+        until = await self._fleet_open_until()
+        if until is not None:
+            self._trip(until); return False
+        if redis_client:
+            try:
+                pkey = f"{self._redis_key}:probes"
+                n = await redis_client.incr(pkey)
+                if n == 1: await redis_client.pexpire(pkey, int(PCO_BREAKER_OPEN_SECONDS * 1000))
+                if n > PCO_BREAKER_HALF_OPEN_PROBES: return False
+            except redis.RedisError:
+                pass
+        self._probes += 1; return True
+
+    def _reject(self):
+        self.counters["rejected"] += 1
+        retry_after = max(1, math.ceil(self.opened_until - time.time()))
+        raise HTTPException(status_code=503, detail=f"Planning Center ({self.key}) is unavailable; failing fast.",
+                            headers={"Retry-After": str(retry_after)})
+
+    async def before_call(self) -> bool:
+        """Raises 503 while open; returns True when this call is a half-open probe."""
+        await self._sync()
+        if self.state == "open":
+            if time.time() < self.opened_until: self._reject()
+            self.state = "half_open"; self._probes = self._probe_successes = 0
+        if self.state == "half_open":
+            if not await self._claim_probe(): self._reject()
+            return True
+        return False
+
+    async def after_call(self, probe: bool, failed: Optional[bool], elapsed: float):
+        """Record an outcome; failed=None means the call was cancelled and only frees its probe slot."""
+        if probe:
+            self._probes = max(0, self._probes - 1)
+            if self.state != "half_open": return
+            if failed is None:
+                # A cancelled probe proved nothing: hand its slot back to the fleet
+                if redis_client:
+                    try: await redis_client.decr(f"{self._redis_key}:probes")
+                    except redis.RedisError: pass
+                return
+            if failed:
+                self._trip(); await self._publish_open(); return
+            if await self._record_probe_success() >= PCO_BREAKER_HALF_OPEN_PROBES:
+                # Never erase a trip another instance published while these probes were in flight
+                until = await self._fleet_open_until()
+                if until is not None:
+                    self._trip(until); return
+                self._close()
+                if redis_client:
+                    # probe_ok stays (until it expires) so instances still half-open adopt the close
+                    try: await redis_client.delete(self._redis_key, f"{self._redis_key}:probes")
+                    except redis.RedisError: pass
+            return
+        if self.state != "closed" or failed is None: return
+        now = time.monotonic(); calls = self._calls
+        calls.append((now, failed, elapsed >= PCO_BREAKER_SLOW_SECONDS))
+        while calls and now - calls[0][0] > PCO_BREAKER_WINDOW: calls.popleft()
+        if len(calls) < PCO_BREAKER_MIN_CALLS: return
+        failures = sum(1 for c in calls if c[1]); slow = sum(1 for c in calls if c[2])
+        if failures / len(calls) >= PCO_BREAKER_FAILURE_RATIO or slow / len(calls) >= PCO_BREAKER_SLOW_RATIO:
+            self._trip(); await self._publish_open()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "opened_until": self.opened_until if self.state == "open" else None,
+                "window_calls": len(self._calls), **self.counters}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def _breaker_for(url: str) -> CircuitBreaker:
+    # Route family is the first path segment of the PCO URL: people, services, ...
+    parts = urlsplit(url); family = (parts.path.strip("/").split("/") or [""])[0] or "root"
+    key = f"{parts.hostname}:{family}"
+    breaker = _breakers.get(key)
+    if breaker is None: breaker = _breakers[key] = CircuitBreaker(key)
+    return breaker
+
+# ---- Single flight ----
+def _single_flight(inflight: dict, key, start) -> tuple:
+    """(task, joined): the task running for key in inflight, or a new one from start() if none is.
+
+    The entry is dropped as soon as that task finishes, so results are shared, never cached. Callers
+    await the task through asyncio.shield when one cancelled caller mustn't cancel it for the rest.
+    A task that is finishing or being cancelled is never joined; it is replaced by a fresh one.
+    """
+    task = inflight.get(key)
+    if task is not None and not task.done() and not task.cancelling(): return task, True
+    task = inflight[key] = asyncio.ensure_future(start())
+    task.add_done_callback(lambda t: inflight.pop(key, None) if inflight.get(key) is t else None)
+    return task, False
+
+# ---- Request coalescing ----
+# Concurrent identical GETs (tenant, URL, sorted params, credentials) share one in-flight fetch: one
+# rate-limiter token, one upstream request (with its retries) and one JSON parse. The shared task is
+# cancelled only once every waiter is gone.
+_get_inflight: Dict[tuple, asyncio.Task] = {}
+_get_waiters: Dict[asyncio.Task, int] = {}
+coalesce_counters = {"upstream": 0, "joined": 0}
+
+async def pco_get(url: str, headers: dict, params: Optional[dict] = None, max_retries: Optional[int] = None, tenant: str = "default"):
+    key = (tenant, url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())), headers.get("Authorization"), max_retries)
+    task, joined = _single_flight(_get_inflight, key, lambda: _pco_get_shared(url, headers, params, max_retries, tenant))
+    coalesce_counters["joined" if joined else "upstream"] += 1
+    _get_waiters[task] = _get_waiters.get(task, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if _get_waiters[task] == 1 and not task.done():
+            # unpublish before cancelling so a caller arriving next tick starts its own fetch
+            if _get_inflight.get(key) is task: del _get_inflight[key]
+            task.cancel()
+        raise
+    finally:
+        _get_waiters[task] -= 1
+        if not _get_waiters[task]: del _get_waiters[task]
+
+async def _pco_get_shared(url: str, headers: dict, params: Optional[dict], max_retries: Optional[int], tenant: str):
+    if PCO_CONDITIONAL_REQUESTS and redis_client and _REVALIDATE_RE.match(url):
+        r = await _pco_get_conditional(url, headers, params, max_retries, tenant)
+    else:
+        r = await _pco_get_uncoalesced(url, headers, params, max_retries=max_retries, tenant=tenant)
+    if r.status_code == 200 and "json" in r.headers.get("content-type", ""):
+        parsed = []
+        def shared_json(**kwargs):
+            # Parsed on first use (callers decoding r.content with a Sparse schema never pay for it),
+            # then reused by every coalesced caller
+            if not parsed: parsed.append(codec.loads(r.content))
+            return parsed[0]
+        r.json = shared_json
+    return r
+
+# ---- Conditional requests ----
+# Service-type catalog pages (re-read by every catalog refresh) and past plans rarely change, so their
+# bodies are stored in Redis with their ETag / Last-Modified under pco:{tenant}:validators:{digest}; the
+# next fetch sends If-None-Match / If-Modified-Since and a 304 is answered from the stored body without
+# downloading it again. Upcoming plans are still being edited and aren't stored.
+_REVALIDATE_RE = re.compile(r"^https://api\.planningcenteronline\.com/services/v2/(?:(service_types)(?:\?.*)?|plans/\d+)$")
+conditional_counters: Dict[str, Dict[str, int]] = {}  # upstream route -> requests / not_modified / bytes_saved
+
+_PLAN_DATES = Sparse("Plan", ("last_time_at", "sort_date"))  # the route parses the body itself: read only these
+
+def _plan_is_past(content: bytes) -> bool:
+    try:
+        attrs = _PLAN_DATES.decode(content).data[0]["attributes"]
+        when = datetime.fromisoformat(attrs.get("last_time_at") or attrs["sort_date"])
+    except (ValueError, KeyError, TypeError, IndexError):
+        return False
+    return when.astimezone(timezone.utc) < datetime.now(timezone.utc)
+
+def _worth_storing(url: str, content: bytes) -> bool:
+    return bool(_REVALIDATE_RE.match(url).group(1)) or _plan_is_past(content)
+
+def _route_label(url: str) -> str:
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlsplit(url).path)
+
+async def _pco_get_conditional(url: str, headers: dict, params: Optional[dict], max_retries: Optional[int], tenant: str):
+    query = urlencode(sorted((k, str(v)) for k, v in (params or {}).items()))
+    key = f"pco:{tenant}:validators:{hashlib.sha256(f'{url}?{query}'.encode()).hexdigest()[:32]}"
+    # Validators only: the stored body is read back only on a 304
+    etag, last_modified = await redis_client.hmget(key, "etag", "last_modified")
+    extra = {}
+    if etag: extra["If-None-Match"] = etag
+    if last_modified: extra["If-Modified-Since"] = last_modified
+    r = await _pco_get_uncoalesced(url, {**headers, **extra} if extra else headers, params, max_retries=max_retries, tenant=tenant)
+    c = conditional_counters.setdefault(_route_label(url), {"requests": 0, "not_modified": 0, "bytes_saved": 0})
+    c["requests"] += 1
+    if r.status_code == 304 and extra:
+        body, content_type = await redis_client.hmget(key, "body", "content_type")
+        if body is not None:
+            body = body.encode(); c["not_modified"] += 1; c["bytes_saved"] += len(body)
+            await redis_client.expire(key, int(PCO_VALIDATOR_TTL))
+            return httpx.Response(200, content=body, request=r.request,
+                                  headers={"content-type": content_type or "application/json", "etag": etag or ""})
+        # Stored entry evicted between the two reads: fetch it unconditionally
+        await redis_client.delete(key)
+        return await _pco_get_uncoalesced(url, headers, params, max_retries=max_retries, tenant=tenant)
+    validators = {"etag": r.headers.get("etag"), "last_modified": r.headers.get("last-modified")}
+    if r.status_code == 200 and any(validators.values()) and _worth_storing(url, r.content):
+        await redis_client.hset(key, mapping={**{k: v for k, v in validators.items() if v}, "body": r.text,
+                                              "content_type": r.headers.get("content-type", "")})
+        await redis_client.expire(key, int(PCO_VALIDATOR_TTL))
+    elif r.status_code == 200 and extra:
+        await redis_client.delete(key)  # changed and no longer storable
+    return r
+
+async def pco_stream(url: str, headers: dict, params: Optional[dict] = None, tenant: str = "default") -> httpx.Response:
+    """pco_get without coalescing or reading the body: the caller gets an open response (status and
+    headers only) and must stream it and aclose() it. Retries happen before any body byte is read."""
+    return await _pco_get_uncoalesced(url, headers, params, tenant=tenant, stream=True)
+
+async def _pco_get_uncoalesced(url: str, headers: dict, params: Optional[dict] = None, max_retries: Optional[int] = None,
+                               tenant: str = "default", stream: bool = False):
+    max_retries = retry_policy.max_retries if max_retries is None else max_retries
+    attempt = 0; delay = 0.0
+    client = _http(); breaker = _breaker_for(url)
+    while True:
+        probe = await breaker.before_call()
+        await rate_limiter.acquire(tenant)
+        if attempt == 0: retry_budget.record_request()
+        r = error = None; started = time.monotonic()
+        try:
+            async with _TenantSlot(tenant):
+                if stream: r = await client.send(client.build_request("GET", url, headers=headers, params=params), stream=True)
+                else: r = await client.get(url, headers=headers, params=params)
+        except httpx.TransportError as e:
+            error = e
+        except BaseException:
+            await breaker.after_call(probe, failed=None, elapsed=0.0)
+            raise
+        await breaker.after_call(probe, failed=error is not None or r.status_code >= 500, elapsed=time.monotonic() - started)
+        if r is not None: await rate_limiter.observe(tenant, r)
+        if not retry_policy.retryable(r, error):
+            return r
+        reason = type(error).__name__ if error is not None else str(r.status_code)
+        if attempt >= max_retries or not retry_budget.try_spend(reason):
+            retry_budget.counters["gave_up"] += 1
+            if error is not None: raise _upstream_unreachable(url, error, retry_policy.next_delay(delay)) from error
+            return r
+        if stream and r is not None: await r.aclose()
+        delay = retry_policy.next_delay(delay, _retry_after_seconds(r) if r is not None else None)
+        await asyncio.sleep(delay)
+        attempt += 1
 
 async def exchange_code_for_token(code: str, code_verifier: Optional[str] = None) -> dict:
-    async with httpx.AsyncClient(timeout=20) as client:
-        form = {"grant_type": "authorization_code", "code": code, "redirect_uri": PCO_REDIRECT_URI,
-                "client_id": PCO_CLIENT_ID, "client_secret": PCO_CLIENT_SECRET}
-        if code_verifier: form["code_verifier"] = code_verifier
-        r = await client.post(TOKEN_URL, data=form)
-        if r.status_code == 200: return r.json()
-        basic = base64.b64encode(f"{PCO_CLIENT_ID}:{PCO_CLIENT_SECRET}".encode()).decode()
-        form2 = {"grant_type": "authorization_code", "code": code, "redirect_uri": PCO_REDIRECT_URI}
-        if code_verifier: form2["code_verifier"] = code_verifier
-        r2 = await client.post(TOKEN_URL, data=form2, headers={"Authorization": f"Basic {basic}"})
-        if r2.status_code == 200: return r2.json()
-        return {"error": "token_exchange_failed", "status": r2.status_code, "body": r2.text}
+    client = _http()
+    form = {"grant_type": "authorization_code", "code": code, "redirect_uri": PCO_REDIRECT_URI,
+            "client_id": PCO_CLIENT_ID, "client_secret": PCO_CLIENT_SECRET}
+    if code_verifier: form["code_verifier"] = code_verifier
+    r = await client.post(TOKEN_URL, data=form, timeout=PCO_TOKEN_TIMEOUT)
+    if r.status_code == 200: return r.json()
+    basic = base64.b64encode(f"{PCO_CLIENT_ID}:{PCO_CLIENT_SECRET}".encode()).decode()
+    form2 = {"grant_type": "authorization_code", "code": code, "redirect_uri": PCO_REDIRECT_URI}
+    if code_verifier: form2["code_verifier"] = code_verifier
+    r2 = await client.post(TOKEN_URL, data=form2, headers={"Authorization": f"Basic {basic}"}, timeout=PCO_TOKEN_TIMEOUT)
+    if r2.status_code == 200: return r2.json()
+    return {"error": "token_exchange_failed", "status": r2.status_code, "body": r2.text}
 
 async def refresh_access_token(refresh_token: str) -> dict:
-    async with httpx.AsyncClient(timeout=20) as client:
-        data = {"grant_type": "refresh_token", "refresh_token": refresh_token, "client_id": PCO_CLIENT_ID, "client_secret": PCO_CLIENT_SECRET}
-        r = await client.post(TOKEN_URL, data=data); r.raise_for_status(); return r.json()
+    data = {"grant_type": "refresh_token", "refresh_token": refresh_token, "client_id": PCO_CLIENT_ID, "client_secret": PCO_CLIENT_SECRET}
+    r = await _http().post(TOKEN_URL, data=data, timeout=PCO_TOKEN_TIMEOUT); r.raise_for_status(); return r.json()
 
 async def get_valid_access_token(tkey: str) -> str:
+    cached = _token_cache_get(tkey)
+    if cached: return cached["access_token"]
     entry = await _redis_get_token(tkey)
+    if entry: _token_cache_put(tkey, entry)
     if not entry:
         raise HTTPException(status_code=401, detail="Not connected to Planning Center. Visit /connect.")
-    if entry.get("expires_at") and entry["expires_at"] - time.time() < 60 and entry.get("refresh_token"):
-        newt = await refresh_access_token(entry["refresh_token"])
-        entry["access_token"] = newt["access_token"]
-        entry["refresh_token"] = newt.get("refresh_token", entry["refresh_token"])
-        entry["expires_at"] = time.time() + int(newt.get("expires_in", 3600))
-        await _redis_set_token(tkey, entry, ttl_seconds=int(newt.get("expires_in", 3600)) + 300)
+    if _needs_refresh(entry):
+        entry = await _refresh_single_flight(tkey, entry)
     return entry["access_token"]
 
+# ---- Single-flight refresh ----
+# In-process: one refresh task per tenant that every caller awaits (shielded, so a cancelled caller
+# doesn't cancel it). Across instances: a Redis lock (SET NX PX) holding a fencing token from INCR;
+# the token write is conditional on the lock still holding that fence (or, once the lease has lapsed,
+# on the stored entry still holding the refresh token we spent).
+_refresh_inflight: Dict[str, asyncio.Task] = {}
+_RELEASE_LOCK_LUA = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+
+def _needs_refresh(entry: dict, ahead: float = 60) -> bool:
+    return bool(entry.get("expires_at") and entry["expires_at"] - time.time() < ahead and entry.get("refresh_token"))
+
+async def _refresh_single_flight(tkey: str, entry: dict, ahead: float = 60) -> dict:
+    task, _ = _single_flight(_refresh_inflight, tkey, lambda: _refresh_with_lock(tkey, entry, ahead))
+    return dict(await asyncio.shield(task))
+
+async def _refresh_with_lock(tkey: str, entry: dict, ahead: float = 60) -> dict:
+    lock_key = f"pco:{tkey}:refresh:lock"
+    fence = await redis_client.incr(f"pco:{tkey}:refresh:fence")
+    if not await redis_client.set(lock_key, str(fence), nx=True, px=int(PCO_REFRESH_LOCK_SECONDS * 1000)):
+        return await _await_peer_refresh(tkey, entry)
+    try:
+        # A peer may have finished refreshing between our read and taking the lock
+        current = await _redis_get_token(tkey) or entry
+        if not _needs_refresh(current, ahead): return current
+        newt = await refresh_access_token(current["refresh_token"])
+        expires_in = int(newt.get("expires_in", 3600))
+        fresh = {**current, "access_token": newt["access_token"],
+                 "refresh_token": newt.get("refresh_token", current["refresh_token"]),
+                 "expires_at": time.time() + expires_in}
+        if not await _redis_set_token(tkey, fresh, ttl_seconds=expires_in + 300, fence=fence, consumed=current["refresh_token"]):
+            # Lease lost and a different token was stored meanwhile (a reconnect or a later refresh): that one wins
+            token_refresh_counters["superseded"] += 1
+            return await _redis_get_token(tkey) or fresh
+        return fresh
+    finally:
+        try: await redis_client.eval(_RELEASE_LOCK_LUA, 1, lock_key, str(fence))
+        except redis.RedisError: pass  # the lease expires on its own
+
+async def _await_peer_refresh(tkey: str, entry: dict) -> dict:
+    # Another instance holds the lock: wait for its write rather than racing it with the same refresh token
+    deadline = time.monotonic() + PCO_REFRESH_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        current = await _redis_get_token(tkey)
+        if current and current.get("access_token") != entry.get("access_token"): return current
+        if not await redis_client.exists(f"pco:{tkey}:refresh:lock"): break
+    if entry.get("expires_at", 0) > time.time(): return entry  # still valid, just inside the refresh window
+    raise HTTPException(status_code=503, detail="Planning Center token refresh in progress; retry shortly.", headers={"Retry-After": "1"})
+
+# ---- Background refresher ----
+# One instance at a time (leader lease in Redis) pulls tenants whose expires_at falls inside
+# PCO_REFRESH_AHEAD_SECONDS from TOKEN_EXPIRY_ZSET and refreshes them, so requests never wait on TOKEN_URL.
+_refresher_task: Optional[asyncio.Task] = None
+_refresh_failures: Dict[str, float] = {}  # tenant -> don't retry before (epoch seconds)
+refresher_counters = {"runs": 0, "refreshed": 0, "failed": 0, "dropped": 0}
+
+async def _backfill_expiry_index():
+    # One-off migration for tokens written before the index existed; steady state never scans keys
+    if await redis_client.exists(TOKEN_EXPIRY_ZSET): return
+    async for key in redis_client.scan_iter(match="pco:*:token", count=500):
+        raw = await redis_client.get(key)
+        entry = json.loads(raw) if raw else None
+        if entry and entry.get("expires_at") and entry.get("refresh_token"):
+            await redis_client.zadd(TOKEN_EXPIRY_ZSET, {key[len("pco:"):-len(":token")]: entry["expires_at"]})
+
+async def _refresh_due_tenant(tenant: str, sem: asyncio.Semaphore):
+    async with sem:
+        entry = await _redis_get_token(tenant)
+        if not entry or not entry.get("refresh_token"):
+            await redis_client.zrem(TOKEN_EXPIRY_ZSET, tenant); refresher_counters["dropped"] += 1; return
+        # Spread refreshes across the lead window instead of firing every due tenant at once
+        if not _needs_refresh(entry, PCO_REFRESH_AHEAD_SECONDS * random.uniform(0.5, 1.0)): return
+        try:
+            await _refresh_single_flight(tenant, entry, ahead=PCO_REFRESH_AHEAD_SECONDS)
+            _refresh_failures.pop(tenant, None); refresher_counters["refreshed"] += 1
+        except Exception:
+            # Back off this tenant; the request path still refreshes inside the last 60s
+            _refresh_failures[tenant] = time.time() + PCO_REFRESHER_INTERVAL * 4; refresher_counters["failed"] += 1
+
+async def _refresh_due_tokens():
+    # Paged by score, not offset: each refresh moves its tenant out of the range, so offsets would skip
+    # tenants still due. Skipped (backed-off, jittered) tenants stay in range; `seen` steps over them.
+    now = time.time(); sem = asyncio.Semaphore(PCO_REFRESHER_CONCURRENCY); low = "-inf"; seen: set = set(); batch = 500
+    while True:
+        due = await redis_client.zrangebyscore(TOKEN_EXPIRY_ZSET, low, now + PCO_REFRESH_AHEAD_SECONDS, start=0, num=batch, withscores=True)
+        fresh = [(t, score) for t, score in due if t not in seen]
+        seen.update(t for t, _ in fresh)
+        await asyncio.gather(*(_refresh_due_tenant(t, sem) for t, _ in fresh if _refresh_failures.get(t, 0) <= now))
+        if len(due) < batch: return
+        # Resume at the last score seen; if a whole batch shared it and was already seen, step past it
+        low = repr(due[-1][1]) if fresh else f"({due[-1][1]!r}"
+
+async def _leader_loop(name: str, interval: float, fn):
+    """Every ~interval seconds, run fn() on whichever instance holds the pco:{name}:leader lease."""
+    key = f"pco:{name}:leader"; lease_ms = int(interval * 3 * 1000)
+    while True:
+        await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+        try:
+            leader = await redis_client.set(key, _INSTANCE_ID, nx=True, px=lease_ms)
+            if not leader and await redis_client.get(key) != _INSTANCE_ID: continue
+            await redis_client.pexpire(key, lease_ms)
+            await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # Redis hiccup: try again next tick
+
+async def _refresh_tick():
+    refresher_counters["runs"] += 1
+    await _refresh_due_tokens()
+
+@app.on_event("startup")
+async def _refresher_startup():
+    global _refresher_task
+    if not (redis_client and PCO_REFRESHER_ENABLED): return
+    await _backfill_expiry_index()
+    _refresher_task = asyncio.create_task(_leader_loop("refresher", PCO_REFRESHER_INTERVAL, _refresh_tick))
+
+@app.on_event("shutdown")
+async def _refresher_shutdown():
+    if _refresher_task:
+        _refresher_task.cancel()
+        try: await _refresher_task
+        except asyncio.CancelledError: pass
+
 @app.get("/health")
 async def health():
     # Do not ping Redis each time; just report if client exists
     return {"ok": True, "redis": bool(redis_client)}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return {"retries": retry_budget.snapshot(), "breakers": {k: b.snapshot() for k, b in _breakers.items()},
+            "token_refresher": dict(refresher_counters), "token_refresh": dict(token_refresh_counters),
+            "service_type_catalog": dict(catalog_counters),
+            "people_mirror": dict(people_mirror_counters), "people_find_cache": _people_find_cache_snapshot(),
+            "coalescing": dict(coalesce_counters),
+            "conditional": {route: {**c, "not_modified_rate": round(c["not_modified"] / c["requests"], 4) if c["requests"] else None}
+                            for route, c in conditional_counters.items()}}
+
 @app.get("/openapi-chatgpt.json")
 def openapi_chatgpt(request: Request):
     spec = app.openapi()
@@ -185,152 +1090,720 @@ async def auth_callback(request: Request, code: str = Query(...), state: Optiona
     token_payload = await exchange_code_for_token(code, code_verifier=code_verifier)
     if "error" in token_payload:
         raise HTTPException(status_code=token_payload.get("status", 500), detail={"message": token_payload["error"], "upstream": token_payload.get("body")})
-    tkey = _tenant(request)
+    api_key = None
+    if MULTI_TENANT:
+        # The tenant is the org the user just authorized, so a connect can only ever write that org's token
+        r = await pco_get("https://api.planningcenteronline.com/people/v2", jsonapi_headers_bearer(token_payload["access_token"]), tenant="connect")
+        if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
+        tkey = f"org-{r.json()['data']['id']}"
+    else:
+        tkey = await _tenant(request)
     entry = {"access_token": token_payload["access_token"],
              "refresh_token": token_payload.get("refresh_token"),
              "expires_at": time.time() + int(token_payload.get("expires_in", 3600))}
     await _redis_set_token(tkey, entry, ttl_seconds=int(token_payload.get("expires_in", 3600)) + 300)
+    if MULTI_TENANT:
+        api_key = await _issue_api_key(tkey); request.session["tenant"] = tkey
     request.session.pop("oauth_state", None); request.session.pop("pkce_verifier", None)
-    return {"connected": True, "tenant": tkey, "expires_in": token_payload.get("expires_in"), "has_refresh": bool(token_payload.get("refresh_token"))}
+    out = {"connected": True, "tenant": tkey, "expires_in": token_payload.get("expires_in"), "has_refresh": bool(token_payload.get("refresh_token"))}
+    if api_key: out["api_key"] = api_key  # shown once; configure it as the X-API-Key header in GPT Actions
+    return out
 
-# ---- Helpers for Services ----
-async def _fetch_service_types(headers: dict, page_size: int = 50, max_pages: int = 5):
-    url = "https://api.planningcenteronline.com/services/v2/service_types"
-    params = {"page[size]": min(max(page_size, 1), 100)}
-    items = []; pages = 0
+# ---- Pagination ----
+async def _get_page(url: str, headers: dict, params: Optional[dict], tenant: str) -> dict:
+    r = await pco_get(url, headers, params, tenant=tenant)
+    if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
+
+async def _fetch_collection(url: str, headers: dict, params: Optional[dict] = None, max_pages: int = 5, tenant: str = "default") -> list:
+    """All resources of a JSON:API collection, up to max_pages pages.
+
+    The first page's meta.total_count and meta.next.offset give the remaining offsets, which are fetched
+    concurrently (PCO_PAGINATION_CONCURRENCY at a time). Without them, follows links.next serially.
+    """
+    params = dict(params or {})
+    first = await _get_page(url, headers, params, tenant)
+    items = list(first.get("data", []))
+    next_url = (first.get("links") or {}).get("next")
+    if not next_url or max_pages <= 1: return items
+    meta = first.get("meta") or {}
+    total = meta.get("total_count"); step = (meta.get("next") or {}).get("offset")
+    if isinstance(total, int) and isinstance(step, int) and step > 0:
+        sem = asyncio.Semaphore(PCO_PAGINATION_CONCURRENCY)
+        async def page(offset: int) -> list:
+            async with sem: return (await _get_page(url, headers, {**params, "offset": offset}, tenant)).get("data", [])
+        for data in await asyncio.gather(*(page(o) for o in range(step, min(total, step * max_pages), step))):
+            items.extend(data)
+        return items
+    async for item in _iter_collection(next_url, headers, None, max_pages=max_pages - 1, tenant=tenant):
+        items.append(item)
+    return items
+
+async def _iter_collection(url: str, headers: dict, params: Optional[dict] = None, max_pages: int = 5, tenant: str = "default"):
+    """Yield a collection's resources page by page, following links.next.
+
+    Only the current page is held in memory, and a caller that breaks out early stops further fetches:
+
+        async for item in _iter_collection(url, headers, {"page[size]": 100}, max_pages=20, tenant=tkey):
+            if matches(item): break
+    """
+    async for payload in _iter_pages(url, headers, params, max_pages=max_pages, tenant=tenant):
+        data = payload.get("data", [])
+        del payload  # keep only this page's resources alive while the caller iterates
+        for item in data: yield item
+
+async def _iter_pages(url: str, headers: dict, params: Optional[dict] = None, max_pages: int = 5, tenant: str = "default"):
+    """Yield whole page payloads (data, included, meta) following links.next; for callers that need included."""
+    pages = 0
     while url and pages < max_pages:
-        r = await pco_get(url, headers, params if pages == 0 else None)
-        if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
-        payload = r.json(); items.extend(payload.get("data", []))
+        payload = await _get_page(url, headers, params if pages == 0 else None, tenant)
         url = (payload.get("links") or {}).get("next"); pages += 1
-    return items
+        yield payload
+
+# ---- Helpers for Services ----
+async def _fetch_service_types(headers: dict, page_size: int = 50, max_pages: int = 5, tenant: str = "default"):
+    params = {"page[size]": min(max(page_size, 1), 100)}
+    return await _fetch_collection("https://api.planningcenteronline.com/services/v2/service_types", headers, params,
+                                   max_pages=max_pages, tenant=tenant)
 
 def _normalize_service_type(item: dict):
     attrs = item.get("attributes", {}) if item else {}
     return {"id": item.get("id"), "name": attrs.get("name"), "folder_name": attrs.get("folder_name"), "sequence": attrs.get("sequence")}
 
-def _best_name_matches(items, query: Optional[str]):
-    q = (query or "").strip().lower(); scored = []
-    for it in items:
-        name = (it.get("attributes", {}) or {}).get("name") or ""
-        nlow = name.lower(); score = 0
-        if nlow == q: score = 3
-        elif nlow.startswith(q): score = 2
-        elif q in nlow: score = 1
-        if score > 0: scored.append((score, it))
-    scored.sort(key=lambda t: (-t[0], ((t[1].get('attributes') or {}).get('sequence') or 99999)))
-    return [s[1] for s in scored]
-
-async def _resolve_default_service_type_id(headers: dict) -> Optional[str]:
+# ---- Fuzzy matching ----
+def _bounded_levenshtein(a: str, b: str, bound: int) -> Optional[int]:
+    """Edit distance between a and b, or None when it exceeds bound.
+
+    Bit-parallel (Myers/Hyyrö): one pass over the longer string with the shorter one's columns
+    packed into an int, so the cost is O(len) big-int operations rather than a Python DP loop.
+    """
+    if abs(len(a) - len(b)) > bound: return None
+    if len(a) < len(b): a, b = b, a
+    if not b: return len(a)
+    peq: Dict[str, int] = {}
+    for i, c in enumerate(b): peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << len(b)) - 1; last = 1 << (len(b) - 1); pv = mask; mv = 0; d = len(b)
+    for c in a:
+        eq = peq.get(c, 0); xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv); mh = pv & xh
+        if ph & last: d += 1
+        elif mh & last: d -= 1
+        ph = (ph << 1) | 1; mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask; mv = ph & xv
+    return d if d <= bound else None
+
+class TrigramIndex:
+    """Typo-tolerant lookup over a fixed list of lowercase strings.
+
+    Candidates come from per-word padded trigram postings (Jaccard similarity); the best few are
+    re-scored with a bounded Levenshtein distance, and each keeps the higher of the two scores.
+    """
+    POSTINGS_BUDGET = PCO_FUZZY_POSTINGS_BUDGET  # postings counted per query, however common the query's words are
+
+    def __init__(self, texts: list):
+        self.texts = texts
+        self.gram_sets = [frozenset(self.grams(t)) for t in texts]
+        self.postings: Dict[str, list] = {}
+        for i, g in enumerate(self.gram_sets):
+            for x in g: self.postings.setdefault(x, []).append(i)
+
+    @staticmethod
+    def grams(text: str) -> set:
+        out = set()
+        for w in text.split():
+            p = f"  {w} "; out.update(p[j:j + 3] for j in range(len(p) - 2))
+        return out
+
+    def similar(self, query: str, limit: int = PCO_FUZZY_LIMIT, min_score: float = PCO_FUZZY_MIN_SCORE) -> list:
+        """[(position, score)] best first, score in [0, 1]."""
+        q = " ".join(query.lower().split()); qg = self.grams(q)
+        if not qg: return []
+        # Candidates come from the query's rarer trigrams, rarest first, while their postings fit in
+        # POSTINGS_BUDGET (always at least one list), so words shared across the catalog don't flood
+        # the count; the ones sharing the most get an exact Jaccard score, and only the best of those
+        # the costlier edit distance, which can lift a candidate somewhat above its trigram score
+        postings = sorted((p for p in map(self.postings.get, qg) if p), key=len)
+        keep = 1; volume = len(postings[0]) if postings else 0
+        while keep < len(postings) and volume + len(postings[keep]) <= self.POSTINGS_BUDGET:
+            volume += len(postings[keep]); keep += 1
+        shared = Counter(chain.from_iterable(postings[:keep]))
+        top = heapq.nlargest(limit * 6, shared.items(), key=itemgetter(1)) if len(shared) > limit * 6 else shared.items()
+        gram_sets = self.gram_sets; nq = len(qg)
+        jaccard = [(n / (nq + len(gram_sets[i]) - n), i) for n, i in ((len(qg & gram_sets[i]), i) for i, _ in top)]
+        out = []; bound = max(1, len(q) // 4)
+        for j, i in heapq.nlargest(limit * 2, jaccard):
+            text = self.texts[i]
+            d = _bounded_levenshtein(q, text, bound) if j < 0.9 else None  # already a near-certain match
+            score = max(j, 1 - d / max(len(q), len(text))) if d is not None else j
+            if score >= min_score: out.append((i, round(score, 3)))
+        out.sort(key=lambda t: -t[1])
+        return out[:limit]
+
+# ---- Service-type name index ----
+class ServiceTypeIndex:
+    """Name lookup over a normalized service-type catalog, built once per catalog version.
+
+    Ranking: exact > prefix > substring (case-insensitive), then sequence, then catalog order.
+    Exact names come from a hash, prefixes from a sorted array (bisect), substrings from a
+    trigram index whose candidates are then verified. When nothing matches lexically, a
+    TrigramIndex supplies typo-tolerant matches.
+    """
+    GRAM = 3
+
+    def __init__(self, items: list):
+        self.items = items
+        self.names = [(it.get("name") or "").lower() for it in items]
+        self.seq = [it.get("sequence") or 99999 for it in items]
+        self.exact: Dict[str, list] = {}
+        for i, n in enumerate(self.names): self.exact.setdefault(n, []).append(i)
+        self.sorted_names = sorted((n, i) for i, n in enumerate(self.names))
+        self.fuzzy = TrigramIndex(self.names)
+        self.grams: Dict[str, set] = {}
+        for i, n in enumerate(self.names):
+            for g in {n[j:j + self.GRAM] for j in range(len(n) - self.GRAM + 1)}: self.grams.setdefault(g, set()).add(i)
+
+    def _prefixed(self, q: str) -> list:
+        lo = bisect.bisect_left(self.sorted_names, (q, -1)); out = []
+        for n, i in self.sorted_names[lo:]:
+            if not n.startswith(q): break
+            out.append(i)
+        return out
+
+    def _containing(self, q: str) -> list:
+        if len(q) < self.GRAM: return [i for i, n in enumerate(self.names) if q in n]
+        postings = sorted((self.grams.get(q[j:j + self.GRAM], set()) for j in range(len(q) - self.GRAM + 1)), key=len)
+        candidates = set.intersection(*postings) if postings[0] else set()
+        return [i for i in candidates if q in self.names[i]]
+
+    LEXICAL = {3: ("exact", 1.0), 2: ("prefix", 0.9), 1: ("substring", 0.8)}
+
+    def search(self, query: Optional[str], limit: Optional[int] = None, fuzzy: bool = True) -> list:
+        """[(item, match kind, score)] best first; limit restricts matching to the first `limit` catalog entries.
+
+        Fuzzy (typo-tolerant) matches are only returned when nothing matches lexically.
+        """
+        q = (query or "").strip().lower(); tier: Dict[int, int] = {}
+        for i in self._containing(q): tier[i] = 1
+        for i in self._prefixed(q): tier[i] = 2
+        for i in self.exact.get(q, ()): tier[i] = 3
+        ranked = sorted((i for i in tier if limit is None or i < limit), key=lambda i: (-tier[i], self.seq[i], i))
+        if ranked or not fuzzy or not q:
+            return [(self.items[i], *self.LEXICAL[tier[i]]) for i in ranked]
+        close = [(i, sc) for i, sc in self.fuzzy.similar(q) if limit is None or i < limit]
+        close.sort(key=lambda t: (-t[1], self.seq[t[0]], t[0]))
+        return [(self.items[i], "fuzzy", sc) for i, sc in close]
+
+    def matches(self, query: Optional[str], limit: Optional[int] = None, fuzzy: bool = True) -> list:
+        return [item for item, _, _ in self.search(query, limit, fuzzy)]
+
+_name_indexes: Dict[str, tuple] = {}  # tenant -> (catalog version, ServiceTypeIndex)
+
+def _name_index(tenant: str, catalog: dict) -> ServiceTypeIndex:
+    hit = _name_indexes.get(tenant)
+    if hit and hit[0] == catalog["version"]: return hit[1]
+    index = ServiceTypeIndex(catalog["items"]); _name_indexes[tenant] = (catalog["version"], index)
+    return index
+
+# ---- Service-type catalog cache ----
+# Normalized catalog per tenant in Redis (pco:{tenant}:service_types) with an in-process L1.
+# Past PCO_CATALOG_TTL the cached copy is still returned immediately while a single background
+# refresh (one task per process, one NX lock across instances) revalidates it. Before downloading,
+# a refresh adopts a copy a peer already wrote to Redis, so one download serves the whole fleet.
+_catalog_l1: Dict[str, dict] = {}  # tenant -> {"items", "fetched_at", "version"}
+_catalog_refreshing: Dict[str, asyncio.Task] = {}
+catalog_counters = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "stale_served": 0, "refreshes": 0, "adopted": 0}
+
+def _catalog_version(items: list) -> str:
+    return hashlib.sha1(json.dumps([[i["id"], i["name"], i["sequence"]] for i in items]).encode()).hexdigest()[:16]
+
+def _install_catalog(tenant: str, catalog: dict):
+    previous = _catalog_l1.get(tenant)
+    _catalog_l1[tenant] = catalog
+    _name_index(tenant, catalog)
+    if previous and previous["version"] != catalog["version"]: _default_type_memo.pop(tenant, None)
+
+async def _adopt_shared_catalog(tenant: str) -> Optional[dict]:
+    """The Redis copy when a peer refreshed it after our L1 copy and it is still fresh, installed in L1."""
+    if not redis_client: return None
+    raw = await redis_client.get(f"pco:{tenant}:service_types")
+    if not raw: return None
+    shared = json.loads(raw); current = _catalog_l1.get(tenant)
+    if time.time() - shared["fetched_at"] > PCO_CATALOG_TTL: return None
+    if current and shared["fetched_at"] <= current["fetched_at"]: return None
+    _install_catalog(tenant, shared); catalog_counters["adopted"] += 1
+    return shared
+
+async def _load_service_type_catalog(headers: dict, tenant: str) -> dict:
+    items = [_normalize_service_type(i) for i in await _fetch_service_types(headers, page_size=100, max_pages=PCO_CATALOG_MAX_PAGES, tenant=tenant)]
+    catalog = {"items": items, "fetched_at": time.time(), "version": _catalog_version(items)}
+    _install_catalog(tenant, catalog); catalog_counters["refreshes"] += 1
+    if redis_client:
+        await redis_client.set(f"pco:{tenant}:service_types", json.dumps(catalog), ex=int(PCO_CATALOG_TTL + PCO_CATALOG_STALE_TTL))
+    return catalog
+
+async def _refresh_catalog_once(headers: dict, tenant: str, background: bool) -> Optional[dict]:
+    async def run():
+        lock = f"pco:{tenant}:service_types:refreshing"
+        # In the background, skip if another instance is already revalidating this tenant (taking its
+        # copy if it already landed)
+        if background and redis_client and not await redis_client.set(lock, _INSTANCE_ID, nx=True, px=30_000):
+            return await _adopt_shared_catalog(tenant)
+        try: return await _adopt_shared_catalog(tenant) or await _load_service_type_catalog(headers, tenant)
+        finally:
+            if background and redis_client: await redis_client.delete(lock)
+    task, joined = _single_flight(_catalog_refreshing, tenant, run)
+    if background and not joined: task.add_done_callback(lambda t: t.cancelled() or t.exception())  # swallow; stale copy keeps serving
+    if background: return None
+    # A background run that deferred to another instance returns None; then load it ourselves
+    return await asyncio.shield(task) or await _load_service_type_catalog(headers, tenant)
+
+async def _service_type_catalog(headers: dict, tenant: str) -> list:
+    return (await _service_type_catalog_entry(headers, tenant))["items"]
+
+async def _service_type_catalog_entry(headers: dict, tenant: str) -> dict:
+    catalog = _catalog_l1.get(tenant)
+    if catalog: catalog_counters["l1_hits"] += 1
+    elif redis_client:
+        raw = await redis_client.get(f"pco:{tenant}:service_types")
+        if raw:
+            catalog = _catalog_l1[tenant] = json.loads(raw); catalog_counters["l2_hits"] += 1
+    if not catalog or time.time() - catalog["fetched_at"] > PCO_CATALOG_TTL + PCO_CATALOG_STALE_TTL:
+        catalog_counters["misses"] += 1
+        return await _refresh_catalog_once(headers, tenant, background=False)
+    if time.time() - catalog["fetched_at"] > PCO_CATALOG_TTL:
+        catalog_counters["stale_served"] += 1
+        await _refresh_catalog_once(headers, tenant, background=True)
+    return catalog
+
+# ---- Default service type ----
+# DEFAULT_SERVICE_TYPE_NAME resolved once per tenant and catalog version, memoized in process and in
+# Redis (pco:{tenant}:default_service_type); a catalog whose version changed invalidates it.
+_default_type_memo: Dict[str, dict] = {}  # tenant -> {"name", "version", "id"}
+
+async def _resolve_default_service_type_id(headers: dict, tenant: str = "default") -> Optional[str]:
     if DEFAULT_SERVICE_TYPE_ID: return DEFAULT_SERVICE_TYPE_ID
-    if DEFAULT_SERVICE_TYPE_NAME:
-        items = await _fetch_service_types(headers, page_size=100, max_pages=5)
-        matches = _best_name_matches(items, DEFAULT_SERVICE_TYPE_NAME)
-        if matches: return matches[0].get("id")
-    return None
+    if not DEFAULT_SERVICE_TYPE_NAME: return None
+    catalog = await _service_type_catalog_entry(headers, tenant)
+    memo = _default_type_memo.get(tenant)
+    if memo is None and redis_client:
+        raw = await redis_client.get(f"pco:{tenant}:default_service_type")
+        memo = json.loads(raw) if raw else None
+    if memo and memo["version"] == catalog["version"] and memo["name"] == DEFAULT_SERVICE_TYPE_NAME:
+        _default_type_memo[tenant] = memo; return memo["id"]
+    # A configured name must match lexically: a stale or mistyped one should fail loudly, not pick a lookalike
+    matches = _name_index(tenant, catalog).matches(DEFAULT_SERVICE_TYPE_NAME, fuzzy=False)
+    memo = {"name": DEFAULT_SERVICE_TYPE_NAME, "version": catalog["version"],
+            "id": matches[0].get("id") if matches else None}
+    _default_type_memo[tenant] = memo
+    if redis_client:
+        await redis_client.set(f"pco:{tenant}:default_service_type", json.dumps(memo), ex=int(PCO_CATALOG_TTL + PCO_CATALOG_STALE_TTL))
+    return memo["id"]
+
+async def _warm_default_service_types():
+    # Connected tenants are the ones in the token expiry index (plus the single-tenant default)
+    tenants = set(await redis_client.zrange(TOKEN_EXPIRY_ZSET, 0, -1))
+    if not MULTI_TENANT: tenants.add("default")
+    sem = asyncio.Semaphore(5)
+    async def warm(tenant: str):
+        async with sem:
+            try: await _resolve_default_service_type_id(jsonapi_headers_bearer(await get_valid_access_token(tenant)), tenant)
+            except Exception: pass  # not connected / upstream down: resolved lazily on first request
+    await asyncio.gather(*(warm(t) for t in tenants))
+
+_default_type_warmup: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def _default_type_startup():
+    global _default_type_warmup
+    if redis_client and DEFAULT_SERVICE_TYPE_NAME and not DEFAULT_SERVICE_TYPE_ID:
+        _default_type_warmup = asyncio.create_task(_warm_default_service_types())
+
+@app.on_event("shutdown")
+async def _default_type_shutdown():
+    if _default_type_warmup and not _default_type_warmup.done():
+        _default_type_warmup.cancel()
+        try: await _default_type_warmup
+        except asyncio.CancelledError: pass
 
 # ---- People ----
-@app.get("/pco/people/find")
-async def find_person(request: Request, name: str = Query(..., description="Full or partial name"),
-                      page_size: int = Query(5, ge=1, le=100), **fields):
-    token = await get_valid_access_token(_tenant(request))
-    headers = jsonapi_headers_bearer(token)
-    params = {"where[name]": name, "include": "emails,phone_numbers", "page[size]": page_size}
-    for k, v in fields.items():
-        if k.startswith("fields[") and v: params[k] = v
-    r = await pco_get("https://api.planningcenteronline.com/people/v2/people", headers, params)
-    if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
-    data = r.json(); included = {f"{i.get('type')}:{i.get('id')}": i for i in data.get("included", [])} if data.get("included") else {}
+PEOPLE_URL = "https://api.planningcenteronline.com/people/v2/people"
+# What find_person emits (and so the fields[...] it asks PCO for by default); the mirror also needs updated_at
+_PEOPLE = Sparse("Person", ("name", "first_name", "last_name"),
+                 emails=("Email", ("address",)), phone_numbers=("PhoneNumber", ("number",)))
+_PEOPLE_MIRROR = Sparse("Person", ("name", "first_name", "last_name", "updated_at"),
+                        emails=("Email", ("address",)), phone_numbers=("PhoneNumber", ("number",)))
+
+def _fields_params(request: Request) -> Dict[str, str]:
+    """Caller-supplied sparse fieldsets (`fields[Type]=a,b`), which override a route's defaults per type."""
+    return {k: v for k, v in request.query_params.items() if k.startswith("fields[") and k.endswith("]") and v}
+
+def _people_from_document(doc: Document) -> list:
+    """Flatten a people page (with emails, phone_numbers included) into our person dicts."""
     results = []
-    for item in data.get("data", []):
-        attrs = item.get("attributes", {}); rel = item.get("relationships", {})
-        emails, phones = [], []
-        if rel.get("emails", {}).get("data"):
-            for ref in rel["emails"]["data"]:
-                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); addr = (inc.get("attributes") or {}).get("address") if inc else None
-                if addr: emails.append(addr)
-        if rel.get("phone_numbers", {}).get("data"):
-            for ref in rel["phone_numbers"]["data"]:
-                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); num = (inc.get("attributes") or {}).get("number") if inc else None
-                if num: phones.append(num)
+    for item in doc.data:
+        attrs = item.get("attributes") or {}
         results.append({"id": item.get("id"), "name": attrs.get("name"),
                         "first_name": attrs.get("first_name"), "last_name": attrs.get("last_name"),
-                        "emails": emails, "phones": phones})
-    return {"count": len(results), "people": results}
+                        "emails": [a["address"] for a in doc.related_attributes(item, "emails") if a.get("address")],
+                        "phones": [a["number"] for a in doc.related_attributes(item, "phone_numbers") if a.get("number")]})
+    return results
+
+# ---- People directory mirror ----
+# Opt-in per tenant (POST /pco/people/mirror). People with their emails and phones live in Redis
+# (pco:{tenant}:people, one JSON record per id) and are synced incrementally with
+# where[updated_at][gte]; a periodic full sync also drops deleted people. Each instance keeps an
+# in-memory PeopleIndex per tenant; when the mirror's version changes a background task rebuilds it
+# (off the event loop) while searches keep using the previous one.
+PEOPLE_MIRROR_TENANTS = "pco:people_mirror:tenants"
+_people_indexes: Dict[str, tuple] = {}  # tenant -> (version, PeopleIndex or None, checked_at)
+_people_mirrored: list = [frozenset(), float("-inf")]  # [opted-in tenants, checked_at]: one SMEMBERS per instance, not per tenant
+_people_index_builds: Dict[str, asyncio.Task] = {}
+_people_sync_task: Optional[asyncio.Task] = None
+_people_initial_syncs: set = set()  # full syncs started by POST /pco/people/mirror, held until done
+people_mirror_counters = {"searches": 0, "syncs": 0, "full_syncs": 0, "synced_people": 0, "sync_errors": 0,
+                          "index_builds": 0, "index_errors": 0}
+
+class PeopleIndex:
+    """Token-prefix search over mirrored people, with TrigramIndex as the typo-tolerant fallback.
+
+    Every query word must prefix one of a person's name words (like "jo smi" -> "John Smith");
+    exact full-name hits rank first, then full-name prefixes, then by name.
+    """
+    def __init__(self, people: list):
+        self.people = people
+        self.names = [(p.get("name") or "").lower() for p in people]
+        postings: Dict[str, set] = {}
+        for i, p in enumerate(people):
+            words = " ".join(filter(None, [p.get("name"), p.get("first_name"), p.get("last_name")])).lower().split()
+            for w in words: postings.setdefault(w, set()).add(i)
+        self.postings = postings; self.words = sorted(postings)
+        self.fuzzy = TrigramIndex(self.names)
+
+    def _prefixed(self, prefix: str) -> set:
+        out: set = set(); lo = bisect.bisect_left(self.words, prefix)
+        for w in self.words[lo:]:
+            if not w.startswith(prefix): break
+            out |= self.postings[w]
+        return out
+
+    def search(self, query: str, limit: int = 5) -> list:
+        q = " ".join(query.lower().split()); ids: Optional[set] = None
+        for word in q.split():
+            hits = self._prefixed(word); ids = hits if ids is None else ids & hits
+            if not ids: break
+        if ids:
+            ranked = sorted(ids, key=lambda i: (self.names[i] != q, not self.names[i].startswith(q), self.names[i], i))
+            return [self.people[i] for i in ranked[:limit]]
+        return [self.people[i] for i, _ in self.fuzzy.similar(q, limit=limit)] if q else []
+
+async def _people_mirror_index(tenant: str) -> Optional[PeopleIndex]:
+    """The tenant's index when its mirror is enabled and built, else None (caller goes upstream).
+
+    Never builds inline: a new mirror version starts a background rebuild, and until it lands the
+    previous index (or, on a cold instance, upstream) answers.
+    """
+    if not redis_client: return None
+    now = time.monotonic()
+    if now - _people_mirrored[1] >= PCO_PEOPLE_MIRROR_CHECK_SECONDS:
+        _people_mirrored[1] = now; _people_mirrored[0] = frozenset(await redis_client.smembers(PEOPLE_MIRROR_TENANTS))
+    if tenant not in _people_mirrored[0]:
+        _people_indexes.pop(tenant, None); return None
+    hit = _people_indexes.get(tenant)
+    if not (hit and now - hit[2] < PCO_PEOPLE_MIRROR_CHECK_SECONDS):
+        version = await redis_client.hget(f"pco:{tenant}:people:meta", "version")
+        if not version:
+            hit = _people_indexes[tenant] = (None, None, now)  # also caches "not mirrored"
+        else:
+            hit = _people_indexes[tenant] = (hit[0] if hit else None, hit[1] if hit else None, now)
+            if hit[0] != version: _single_flight(_people_index_builds, tenant, lambda: _build_people_index(tenant, version))
+    if hit and hit[1] is not None:
+        people_mirror_counters["searches"] += 1
+        return hit[1]
+    return None
+
+async def _build_people_index(tenant: str, version: str):
+    try:
+        # HSCAN in chunks rather than one HVALS reply, then decode and index in a worker thread
+        records = []; cursor = 0
+        while True:
+            cursor, chunk = await redis_client.hscan(f"pco:{tenant}:people", cursor, count=1000)
+            records.extend(chunk.values())
+            if not cursor: break
+        index = await asyncio.to_thread(lambda: PeopleIndex([json.loads(r) for r in records]))
+        _people_indexes[tenant] = (version, index, time.monotonic()); people_mirror_counters["index_builds"] += 1
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        people_mirror_counters["index_errors"] += 1  # keep the previous index; retried on the next version check
+
+async def _sync_people(tenant: str, full: bool):
+    lock = f"pco:{tenant}:people:syncing"
+    if not await redis_client.set(lock, _INSTANCE_ID, nx=True, px=600_000): return  # another instance is on it
+    try:
+        headers = jsonapi_headers_bearer(await get_valid_access_token(tenant))
+        meta_key = f"pco:{tenant}:people:meta"; meta = await redis_client.hgetall(meta_key)
+        cursor = None if full else meta.get("cursor")
+        params = {"include": "emails,phone_numbers", "page[size]": 100, "order": "updated_at",
+                  **_PEOPLE_MIRROR.fieldsets("emails,phone_numbers")}
+        if cursor: params["where[updated_at][gte]"] = cursor
+        # A full sync builds a fresh hash and swaps it in, which also drops people deleted upstream
+        target = f"pco:{tenant}:people:building" if full else f"pco:{tenant}:people"
+        if full: await redis_client.delete(target)
+        newest = cursor or ""; synced = changed = 0
+        async for page in _iter_pages(PEOPLE_URL, headers, params, max_pages=PCO_PEOPLE_MIRROR_MAX_PAGES, tenant=tenant):
+            doc = Document(page); people = _people_from_document(doc)
+            updated = {i.get("id"): (i.get("attributes") or {}).get("updated_at") or "" for i in doc.data}
+            records = {p["id"]: json.dumps(p) for p in people}
+            if records and not full:
+                # updated_at >= cursor always returns the newest person again: only write what differs
+                stored = await redis_client.hmget(target, list(records))
+                records = {k: v for (k, v), old in zip(records.items(), stored) if v != old}
+            if records: await redis_client.hset(target, mapping=records)
+            newest = max([newest, *updated.values()]); synced += len(people); changed += len(records)
+        if full: await redis_client.rename(target, f"pco:{tenant}:people") if synced else await redis_client.delete(f"pco:{tenant}:people")
+        fields = {"cursor": newest, "synced_at": time.time()}
+        if full: fields["full_synced_at"] = time.time()
+        await redis_client.hset(meta_key, mapping=fields)
+        if changed or full: await redis_client.hincrby(meta_key, "version", 1)
+        people_mirror_counters["syncs"] += 1; people_mirror_counters["synced_people"] += synced
+        if full: people_mirror_counters["full_syncs"] += 1
+    finally:
+        await redis_client.delete(lock)
+
+async def _sync_people_safely(tenant: str, full: bool):
+    try: await _sync_people(tenant, full)
+    except Exception: people_mirror_counters["sync_errors"] += 1  # keep serving the last good mirror
+
+async def _people_sync_tick():
+    for tenant in await redis_client.smembers(PEOPLE_MIRROR_TENANTS):
+        last_full = float(await redis_client.hget(f"pco:{tenant}:people:meta", "full_synced_at") or 0)
+        await _sync_people_safely(tenant, full=time.time() - last_full > PCO_PEOPLE_FULL_SYNC_INTERVAL)
+
+@app.on_event("startup")
+async def _people_sync_startup():
+    global _people_sync_task
+    if redis_client: _people_sync_task = asyncio.create_task(_leader_loop("people_mirror", PCO_PEOPLE_SYNC_INTERVAL, _people_sync_tick))
+
+@app.on_event("shutdown")
+async def _people_sync_shutdown():
+    tasks = [*_people_index_builds.values(), *_people_initial_syncs, *([_people_sync_task] if _people_sync_task else [])]
+    for task in tasks: task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@app.post("/pco/people/mirror", include_in_schema=False)
+async def enable_people_mirror(request: Request):
+    tkey = await _tenant(request)
+    await get_valid_access_token(tkey)  # must be connected
+    await redis_client.sadd(PEOPLE_MIRROR_TENANTS, tkey); _people_mirrored[1] = float("-inf")
+    task = asyncio.ensure_future(_sync_people_safely(tkey, full=True))
+    _people_initial_syncs.add(task); task.add_done_callback(_people_initial_syncs.discard)
+    return {"tenant": tkey, "enabled": True, "syncing": True}
+
+@app.get("/pco/people/mirror", include_in_schema=False)
+async def people_mirror_status(request: Request):
+    tkey = await _tenant(request)
+    if not redis_client: raise HTTPException(status_code=503, detail="Redis not configured (REDIS_URL missing).")
+    meta = await redis_client.hgetall(f"pco:{tkey}:people:meta")
+    return {"tenant": tkey, "enabled": bool(await redis_client.sismember(PEOPLE_MIRROR_TENANTS, tkey)),
+            "people": await redis_client.hlen(f"pco:{tkey}:people"), "synced_at": float(meta["synced_at"]) if meta.get("synced_at") else None}
+
+@app.delete("/pco/people/mirror", include_in_schema=False)
+async def disable_people_mirror(request: Request):
+    tkey = await _tenant(request)
+    if not redis_client: raise HTTPException(status_code=503, detail="Redis not configured (REDIS_URL missing).")
+    await redis_client.srem(PEOPLE_MIRROR_TENANTS, tkey); _people_mirrored[1] = float("-inf")
+    await redis_client.delete(f"pco:{tkey}:people", f"pco:{tkey}:people:meta")
+    build = _people_index_builds.pop(tkey, None)
+    if build: build.cancel()
+    _people_indexes.pop(tkey, None)
+    return {"tenant": tkey, "enabled": False}
+
+# ---- find_person response cache ----
+# Keyed by tenant + normalized name + page_size + fields[...]; LRU in-process tier, then Redis
+# (pco:{tenant}:people_find:{digest}), both for PCO_PEOPLE_FIND_TTL. Identical concurrent misses share
+# one task in-process, and one instance at a time fills a key (SET NX), peers wait for its write.
+_people_find_l1: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, cached_until)
+_people_find_inflight: Dict[str, asyncio.Task] = {}
+people_find_counters = {"hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0}
+
+def _people_find_key(tenant: str, name: str, page_size: int, params: dict) -> str:
+    parts = [" ".join(name.lower().split()), str(page_size)] + sorted(f"{k}={v}" for k, v in params.items() if k.startswith("fields["))
+    return f"pco:{tenant}:people_find:{hashlib.sha256(chr(0).join(parts).encode()).hexdigest()[:32]}"
+
+def _people_find_remember(key: str, result: dict):
+    _people_find_l1[key] = (result, time.monotonic() + PCO_PEOPLE_FIND_TTL); _people_find_l1.move_to_end(key)
+    while len(_people_find_l1) > PCO_PEOPLE_FIND_CACHE_MAX: _people_find_l1.popitem(last=False)
+
+async def _people_find_cached(key: str, tenant: str, params: dict) -> dict:
+    hit = _people_find_l1.get(key)
+    if hit and hit[1] > time.monotonic():
+        _people_find_l1.move_to_end(key); people_find_counters["hits"] += 1; return hit[0]
+    # Shares the Redis lookup and fill lock too, not just the upstream GET that pco_get already coalesces
+    task, joined = _single_flight(_people_find_inflight, key, lambda: _people_find_fill(key, tenant, params))
+    if joined: people_find_counters["coalesced"] += 1
+    return await asyncio.shield(task)
+
+async def _people_find_fill(key: str, tenant: str, params: dict) -> dict:
+    if redis_client:
+        raw = await redis_client.get(key)
+        if raw:
+            people_find_counters["redis_hits"] += 1; result = json.loads(raw)
+            _people_find_remember(key, result); return result
+        if not await redis_client.set(f"{key}:filling", _INSTANCE_ID, nx=True, px=int(PCO_HTTP_TIMEOUT * 1000)):
+            # A peer is fetching the same lookup: wait briefly for its write, then fetch ourselves
+            deadline = time.monotonic() + min(PCO_HTTP_TIMEOUT, 5.0)
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                raw = await redis_client.get(key)
+                if raw:
+                    people_find_counters["redis_hits"] += 1; result = json.loads(raw)
+                    _people_find_remember(key, result); return result
+                if not await redis_client.exists(f"{key}:filling"): break
+    people_find_counters["misses"] += 1
+    try:
+        headers = jsonapi_headers_bearer(await get_valid_access_token(tenant))
+        people_find_counters["upstream_calls"] += 1
+        r = await pco_get(PEOPLE_URL, headers, params, tenant=tenant)
+        if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
+        results = _people_from_document(_PEOPLE.decode(r.content))
+        result = {"count": len(results), "people": results}
+        _people_find_remember(key, result)
+        if redis_client: await redis_client.set(key, json.dumps(result), px=int(PCO_PEOPLE_FIND_TTL * 1000))
+        return result
+    finally:
+        if redis_client: await redis_client.eval(_RELEASE_LOCK_LUA, 1, f"{key}:filling", _INSTANCE_ID)
+
+def _people_find_cache_snapshot() -> dict:
+    c = people_find_counters; hits = c["hits"] + c["redis_hits"]; lookups = hits + c["misses"] + c["coalesced"]
+    return {**c, "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "saved_upstream_calls": hits + c["coalesced"], "entries": len(_people_find_l1)}
+
+@app.get("/pco/people/find", response_model=PeopleResult)
+async def find_person(request: Request, name: str = Query(..., description="Full or partial name"),
+                      page_size: int = Query(5, ge=1, le=100)):
+    tkey = await _tenant(request)
+    overrides = _fields_params(request)
+    params = {"where[name]": name, "include": "emails,phone_numbers", "page[size]": page_size,
+              **_PEOPLE.fieldsets("emails,phone_numbers"), **overrides}
+    if not overrides:
+        # Opted-in tenants with a synced mirror are answered locally; otherwise (or when cold) go upstream
+        index = await _people_mirror_index(tkey)
+        if index is not None:
+            results = index.search(name, limit=page_size)
+            return FastJSONResponse({"count": len(results), "people": results, "source": "mirror"})
+    return FastJSONResponse(await _people_find_cached(_people_find_key(tkey, name, page_size, params), tkey, params))
 
 # ---- Services: Service Types ----
-@app.get("/pco/services/service-types")
+@app.get("/pco/services/service-types", response_model=ServiceTypesResult)
 async def list_service_types(request: Request, page_size: int = Query(50, ge=1, le=100), max_pages: int = Query(5, ge=1, le=20)):
-    token = await get_valid_access_token(_tenant(request))
+    tkey = await _tenant(request)
+    token = await get_valid_access_token(tkey)
     headers = jsonapi_headers_bearer(token)
-    items = await _fetch_service_types(headers, page_size=page_size, max_pages=max_pages)
-    return {"count": len(items), "service_types": [_normalize_service_type(i) for i in items]}
+    items = (await _service_type_catalog(headers, tkey))[:page_size * max_pages]
+    return FastJSONResponse({"count": len(items), "service_types": items})
 
-@app.get("/pco/services/service-types/resolve")
+@app.get("/pco/services/service-types/resolve", response_model=ServiceTypeMatches)
 async def resolve_service_type(request: Request, query: str = Query(...), page_size: int = Query(50, ge=1, le=100), max_pages: int = Query(5, ge=1, le=20)):
-    token = await get_valid_access_token(_tenant(request))
+    tkey = await _tenant(request)
+    token = await get_valid_access_token(tkey)
     headers = jsonapi_headers_bearer(token)
-    items = await _fetch_service_types(headers, page_size=page_size, max_pages=max_pages)
-    matches = _best_name_matches(items, query)
-    out = [_normalize_service_type(m) for m in matches]
-    return {"query": query, "matches": out, "count": len(out)}
+    catalog = await _service_type_catalog_entry(headers, tkey)
+    out = [{**item, "match": kind, "score": score} for item, kind, score in _name_index(tkey, catalog).search(query, limit=page_size * max_pages)]
+    return FastJSONResponse({"query": query, "matches": out, "count": len(out)})
 
 # Aliases
-@app.get("/pco/services/types")
+@app.get("/pco/services/types", response_model=ServiceTypesResult)
 async def list_types_alias(request: Request, page_size: int = Query(50, ge=1, le=100), max_pages: int = Query(5, ge=1, le=20)):
     return await list_service_types(request, page_size=page_size, max_pages=max_pages)
 
-@app.get("/pco/services/types/resolve")
+@app.get("/pco/services/types/resolve", response_model=ServiceTypeMatches)
 async def resolve_types_alias(request: Request, query: str = Query(...), page_size: int = Query(50, ge=1, le=100), max_pages: int = Query(5, ge=1, le=20)):
     return await resolve_service_type(request, query=query, page_size=page_size, max_pages=max_pages)
 
 # ---- Services: Plans & Plan Detail ----
-@app.get("/pco/services/plans")
+_PLAN_TIME = projection("starts_at", "ends_at", "name")
+_NEEDED_POSITION = projection("team_position_name", "quantity", "assigned_count")
+# What services_plans reads; also the default fields[...] it asks PCO for
+_PLANS = Sparse("Plan", ("sort_date", "dates", "title", "series_title"),
+                plan_times=("PlanTime", ("starts_at", "ends_at", "name")),
+                needed_positions=("NeededPosition", ("team_position_name", "quantity", "assigned_count")))
+
+@app.get("/pco/services/plans", response_model=PlansResult)
 async def services_plans(request: Request, service_type_id: Optional[str] = Query(None), service_type_name: Optional[str] = Query(None),
-                         page_size: int = Query(10, ge=1, le=100), include: str = Query("plan_times,needed_positions,team_members"), **fields):
-    token = await get_valid_access_token(_tenant(request))
+                         page_size: int = Query(10, ge=1, le=100), include: str = Query("plan_times,needed_positions")):
+    tkey = await _tenant(request)
+    token = await get_valid_access_token(tkey)
     headers = jsonapi_headers_bearer(token)
-    use_id = service_type_id
+    use_id = service_type_id; matched = None
     if not use_id and service_type_name:
-        items = await _fetch_service_types(headers, page_size=100, max_pages=5)
-        matches = _best_name_matches(items, service_type_name)
+        catalog = await _service_type_catalog_entry(headers, tkey)
+        matches = _name_index(tkey, catalog).search(service_type_name)
         if not matches: raise HTTPException(status_code=404, detail=f"No service type matched '{service_type_name}'.")
-        use_id = matches[0].get("id")
-    if not use_id: use_id = await _resolve_default_service_type_id(headers)
+        item, kind, score = matches[0]
+        use_id = item.get("id"); matched = {**item, "match": kind, "score": score}
+    if not use_id: use_id = await _resolve_default_service_type_id(headers, tenant=tkey)
     if not use_id: raise HTTPException(status_code=422, detail="Provide service_type_id or service_type_name, or set defaults via env.")
     base = f"https://api.planningcenteronline.com/services/v2/service_types/{use_id}/plans"
-    params = {"include": include, "page[size]": page_size}
-    for k, v in fields.items():
-        if k.startswith("fields[") and v: params[k] = v
-    r = await pco_get(base, headers, params)
+    params = {"include": include, "page[size]": page_size, **_PLANS.fieldsets(include), **_fields_params(request)}
+    r = await pco_get(base, headers, params, tenant=tkey)
     if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
-    data = r.json(); included = {f"{i.get('type')}:{i.get('id')}": i for i in data.get("included", [])} if data.get("included") else {}
+    doc = _PLANS.decode(r.content)
     plans_out = []
-    for item in data.get("data", []):
-        attrs = item.get("attributes", {}); rel = item.get("relationships", {})
-        times, needed_positions = [], []
-        if rel.get("plan_times", {}).get("data"):
-            for ref in rel["plan_times"]["data"]:
-                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); tattrs = (inc.get("attributes") or {}) if inc else {}
-                times.append({"starts_at": tattrs.get("starts_at"), "ends_at": tattrs.get("ends_at"), "name": tattrs.get("name")})
-        if rel.get("needed_positions", {}).get("data"):
-            for ref in rel["needed_positions"]["data"]:
-                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); nattrs = (inc.get("attributes") or {}) if inc else {}
-                needed_positions.append({"team_position_name": nattrs.get("team_position_name"),
-                                         "quantity": nattrs.get("quantity"), "assigned_count": nattrs.get("assigned_count")})
+    for item in doc.data:
+        attrs = item.get("attributes") or {}
         plans_out.append({"id": item.get("id"), "dates": attrs.get("sort_date") or attrs.get("dates"),
                           "title": attrs.get("title"), "series_title": attrs.get("series_title"),
-                          "times": times, "needed_positions": needed_positions})
-    return {"count": len(plans_out), "plans": plans_out}
+                          "times": doc.related_attributes(item, "plan_times", _PLAN_TIME),
+                          "needed_positions": doc.related_attributes(item, "needed_positions", _NEEDED_POSITION)})
+    out = {"count": len(plans_out), "plans": plans_out}
+    if matched: out["service_type"] = matched
+    return FastJSONResponse(out)
+
+class _UpstreamStreamingResponse(StreamingResponse):
+    """Relays an open upstream response chunk by chunk, so memory stays at one chunk whatever its size.
+
+    The upstream response is closed however this one ends, including a client that disconnects before
+    the first chunk (when the body iterator never starts). A failure mid-body can't change the status
+    already sent; it aborts the response instead. Streamed bodies skip ETagMiddleware, so the route's
+    Cache-Control and the tenant Vary are set here.
+    """
+    def __init__(self, upstream: httpx.Response, path: str):
+        super().__init__(upstream.aiter_bytes(), media_type=upstream.headers.get("content-type", "application/vnd.api+json"),
+                         headers={"Cache-Control": _cache_control(path), "Vary": ", ".join(_TENANT_VARY)})
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send):
+        try: await super().__call__(scope, receive, send)
+        finally: await self.upstream.aclose()
 
 @app.get("/pco/services/plan")
-async def services_plan_detail(request: Request, plan_id: str = Query(...), include: str = Query("plan_times,needed_positions,team_members,team_members.person"), **fields):
-    token = await get_valid_access_token(_tenant(request))
+async def services_plan_detail(request: Request, plan_id: str = Query(...), include: str = Query("plan_times,needed_positions,team_members,team_members.person"),
+                               raw: bool = Query(False, description="Stream Planning Center's document through unchanged")):
+    tkey = await _tenant(request)
+    token = await get_valid_access_token(tkey)
     headers = jsonapi_headers_bearer(token)
     base = f"https://api.planningcenteronline.com/services/v2/plans/{plan_id}"
-    params = {"include": include}
-    for k, v in fields.items():
-        if k.startswith("fields[") and v: params[k] = v
-    r = await pco_get(base, headers, params)
+    params = {"include": include, **_fields_params(request)}
+    if raw:
+        r = await pco_stream(base, headers, params, tenant=tkey)
+        if r.status_code != 200:
+            try: detail = (await r.aread()).decode(errors="replace")
+            finally: await r.aclose()
+            raise HTTPException(status_code=r.status_code, detail=detail)
+        return _UpstreamStreamingResponse(r, request.url.path)
+    r = await pco_get(base, headers, params, tenant=tkey)
     if r.status_code != 200: raise HTTPException(status_code=r.status_code, detail=r.text)
-    return r.json()
+    return FastJSONResponse(r.json())
+
+# ---- Shutdown ----
+# Registered after every other hook (shutdown hooks run in registration order): the background tasks
+# above are cancelled and awaited first, so none of them is still using Redis or the HTTP client
+# (or lazily opening a new client) when they close.
+@app.on_event("shutdown")
+async def _close_clients():
+    refreshes = list(_catalog_refreshing.values())
+    for task in refreshes: task.cancel()
+    await asyncio.gather(*refreshes, return_exceptions=True)
+    await _http_shutdown()
+    await _redis_shutdown()
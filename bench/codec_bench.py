@@ -0,0 +1,53 @@
+"""CPU per request for decoding an upstream body and encoding our response.
+
+Compares the old path (stdlib json.loads, then FastAPI's jsonable_encoder and JSONResponse)
+with codec.loads + FastJSONResponse (orjson when installed) for the two heavy routes:
+services_plans (decode, walk, encode a summary) and services_plan_detail (decode and
+re-encode the whole document). Payloads come from bench/jsonapi_bench.py.
+
+    python bench/codec_bench.py [--plans 100] [--included 2000] [--requests 50]
+"""
+import argparse, json, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import codec  # noqa: E402
+from jsonapi import Document  # noqa: E402
+from jsonapi_bench import build_payload, decoded  # noqa: E402
+
+
+def cpu_ms(fn, requests: int) -> float:
+    fn(); best = float("inf")
+    for _ in range(3):
+        t0 = time.process_time()
+        for _ in range(requests): fn()
+        best = min(best, (time.process_time() - t0) / requests * 1000)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plans", type=int, default=100)
+    ap.add_argument("--included", type=int, default=2000)
+    ap.add_argument("--requests", type=int, default=50)
+    args = ap.parse_args()
+    raw = json.dumps(build_payload(args.plans, args.included)).encode()
+    print(f"upstream body {len(raw) / 1024:.0f} KiB, codec: {'orjson' if codec.orjson else 'stdlib json (orjson not installed)'}")
+
+    routes = {
+        "plans": (lambda: JSONResponse(jsonable_encoder({"plans": decoded(Document(json.loads(raw)))})).body,
+                  lambda: codec.FastJSONResponse({"plans": decoded(Document(codec.loads(raw)))}).body),
+        "plan detail": (lambda: JSONResponse(jsonable_encoder(json.loads(raw))).body,
+                        lambda: codec.FastJSONResponse(codec.loads(raw)).body),
+    }
+    print(f"{'route':>12} {'old ms':>8} {'codec ms':>9} {'speedup':>8}")
+    for route, (old, new) in routes.items():
+        assert json.loads(old()) == json.loads(new())
+        o, n = cpu_ms(old, args.requests), cpu_ms(new, args.requests)
+        print(f"{route:>12} {o:>8.2f} {n:>9.2f} {o / n:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Payload size and decode time with and without the routes' default sparse fieldsets.
+
+Builds Planning Center-shaped people and plans pages with PCO's full attribute sets, then
+applies each route's defaults the way PCO would (fields[...] drops undeclared attributes and
+relationships; services_plans no longer includes team_members, which it never emitted) and
+compares body bytes and decode + walk time, with a full parse and with the route's Sparse decode.
+
+    python bench/fieldsets_bench.py [--people 100] [--plans 25]
+"""
+import argparse, json, os, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+import codec  # noqa: E402
+from jsonapi import Document  # noqa: E402
+
+TS = "2024-06-02T09:00:00Z"
+PERSON = {"name": "Ada Lovelace", "first_name": "Ada", "last_name": "Lovelace", "given_name": None, "middle_name": None,
+          "nickname": None, "birthdate": "1815-12-10", "anniversary": None, "gender": "F", "grade": None, "child": False,
+          "graduation_year": None, "site_administrator": False, "accounting_administrator": False,
+          "people_permissions": "Editor", "membership": "Member", "inactivated_at": None, "status": "active",
+          "medical_notes": None, "mfa_configured": False, "created_at": TS, "updated_at": TS,
+          "avatar": "https://avatars.planningcenteronline.com/uploads/initials/AL.png", "demographic_avatar_url": "https://x/y.png",
+          "directory_status": "no_access", "passed_background_check": False, "can_create_forms": False, "can_email_lists": False,
+          "school_type": None, "remote_id": None, "login_identifier": "ada@example.org"}
+EMAIL = {"address": "ada@example.org", "location": "Home", "primary": True, "blocked": False, "created_at": TS, "updated_at": TS}
+PHONE = {"number": "(555) 010-0000", "carrier": None, "location": "Mobile", "primary": True, "created_at": TS, "updated_at": TS,
+         "e164": "+15550100000", "international": "+1 555-010-0000", "national": "(555) 010-0000", "country_code": "US",
+         "formatted_number": "5550100000"}
+PLAN = {"title": "Easter", "series_title": "Risen", "sort_date": TS, "dates": "June 2, 2024", "short_dates": "Jun 2",
+        "created_at": TS, "updated_at": TS, "public": False, "series": None, "plan_notes_count": 3, "other_time_count": 0,
+        "rehearsal_time_count": 1, "service_time_count": 2, "plan_people_count": 15, "needed_positions_count": 3,
+        "items_count": 12, "total_length": 4500, "can_view_order": True, "prefers_order_view": True, "rehearsable": True,
+        "files_expire_at": TS, "multi_day": False, "permissions": "Administrator", "planning_center_url": "https://x/plans/1",
+        "last_time_at": TS, "reminders_disabled": False}
+PLAN_TIME = {"starts_at": TS, "ends_at": TS, "name": "9am", "time_type": "service", "live_starts_at": None,
+             "live_ends_at": None, "recorded": False, "team_reminders": [], "created_at": TS, "updated_at": TS}
+NEEDED = {"team_position_name": "Drums", "quantity": 1, "assigned_count": 0, "scheduled_to": "plan", "created_at": TS, "updated_at": TS}
+PLAN_PERSON = {"status": "C", "team_position_name": "Vocals", "name": "Ada Lovelace", "notes": None, "decline_reason": None,
+               "photo_thumbnail": "https://x/t.png", "notification_changed_by_name": None, "notification_sender_name": None,
+               "can_accept_partial": False, "prepare_notification": False, "created_at": TS, "updated_at": TS}
+
+
+def _resource(type_, id_, attrs, rels=None):
+    return {"type": type_, "id": str(id_), "attributes": dict(attrs), "relationships": rels or {},
+            "links": {"self": f"https://api.planningcenteronline.com/x/{type_}/{id_}"}}
+
+
+def people_page(n: int) -> dict:
+    data, inc = [], []
+    for i in range(n):
+        e, p = f"{i}1", f"{i}2"
+        data.append(_resource("Person", i, PERSON, {"emails": {"data": [{"type": "Email", "id": e}]},
+                                                    "phone_numbers": {"data": [{"type": "PhoneNumber", "id": p}]},
+                                                    "households": {"data": [], "links": {}}, "primary_campus": {"data": None}}))
+        inc += [_resource("Email", e, EMAIL, {"person": {"data": {"type": "Person", "id": str(i)}}}),
+                _resource("PhoneNumber", p, PHONE, {"person": {"data": {"type": "Person", "id": str(i)}}})]
+    return {"data": data, "included": inc, "meta": {"total_count": n, "count": n}, "links": {}}
+
+
+def plans_page(n: int, team_members: bool = True) -> dict:
+    data, inc, k = [], [], 0
+    for i in range(n):
+        rels = {}
+        for name, type_, attrs, count in (("plan_times", "PlanTime", PLAN_TIME, 2), ("needed_positions", "NeededPosition", NEEDED, 3),
+                                          ("team_members", "PlanPerson", PLAN_PERSON, 15 if team_members else 0)):
+            refs = []
+            for _ in range(count):
+                k += 1; refs.append({"type": type_, "id": str(k)}); inc.append(_resource(type_, k, attrs))
+            if refs: rels[name] = {"data": refs}
+        rels["series"] = {"data": None}; rels["created_by"] = {"data": {"type": "Person", "id": "1"}}
+        data.append(_resource("Plan", i, PLAN, rels))
+    return {"data": data, "included": inc, "meta": {"total_count": n, "count": n}, "links": {}}
+
+
+def apply_fieldsets(payload: dict, fieldsets: dict) -> dict:
+    """What PCO sends back for those fields[...]: listed attributes and relationships only."""
+    wanted = {k[len("fields["):-1]: set(v.split(",")) for k, v in fieldsets.items()}
+
+    def trim(r):
+        keep = wanted.get(r["type"])
+        if keep is None: return r
+        return {**r, "attributes": {k: v for k, v in r["attributes"].items() if k in keep},
+                "relationships": {k: v for k, v in r["relationships"].items() if k in keep}}
+    return {**payload, "data": [trim(r) for r in payload["data"]], "included": [trim(r) for r in payload["included"]]}
+
+
+def best_ms(fn) -> float:
+    return min(timeit.repeat(fn, number=10, repeat=7)) / 10 * 1000
+
+
+def walk_plans(doc):
+    return [(doc.related_attributes(p, "plan_times", app._PLAN_TIME), doc.related_attributes(p, "needed_positions", app._NEEDED_POSITION))
+            for p in doc.data]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--people", type=int, default=100)
+    ap.add_argument("--plans", type=int, default=25)
+    args = ap.parse_args()
+    people = people_page(args.people)
+    routes = (("people/find", people, apply_fieldsets(people, app._PEOPLE.fieldsets("emails,phone_numbers")),
+               app._PEOPLE, app._people_from_document),
+              ("services/plans", plans_page(args.plans),
+               apply_fieldsets(plans_page(args.plans, team_members=False), app._PLANS.fieldsets("plan_times,needed_positions")),
+               app._PLANS, walk_plans))
+    print(f"{'route':>15} {'defaults':>9} {'bytes':>9} {'full parse ms':>14} {'Sparse ms':>10}")
+    for route, full, trimmed, sparse, walk in routes:
+        for label, payload in (("off", full), ("on", trimmed)):
+            raw = json.dumps(payload).encode()
+            parsed = best_ms(lambda: walk(Document(codec.loads(raw)))); projected = best_ms(lambda: walk(sparse.decode(raw)))
+            print(f"{route:>15} {label:>9} {len(raw):>9} {parsed:>14.2f} {projected:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
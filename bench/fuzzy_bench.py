@@ -0,0 +1,47 @@
+"""Latency and recall of TrigramIndex.similar on a catalog of names built from shared words.
+
+Names are 2-4 words drawn from a small vocabulary ("sunday", "morning", "service", ...) plus a
+number, so most trigrams are common across the catalog. Queries are catalog names with one typo,
+plus bare two-word phrases; recall is how often the typo'd name's original is among the results.
+
+    python bench/fuzzy_bench.py [--names 10000] [--queries 2500]
+"""
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+
+WORDS = ("sunday morning service evening worship youth kids night prayer contemporary traditional campus north "
+         "south east west main chapel student ministry wednesday saturday celebration gathering choir band early "
+         "late online live").split()
+
+
+def typo(rng: random.Random, name: str) -> str:
+    chars = list(name); chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=10000)
+    ap.add_argument("--queries", type=int, default=2500)
+    args = ap.parse_args()
+    rng = random.Random(1)
+    names = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) + f" {i % 97}" for i in range(args.names)]
+    index = app.TrigramIndex(names)
+    targets = [rng.randrange(len(names)) for _ in range(args.queries * 4 // 5)]
+    queries = [typo(rng, names[i]) for i in targets] + [" ".join(rng.sample(WORDS, 2)) for _ in range(args.queries // 5)]
+    runs = []
+    for _ in range(5):
+        times = []
+        for q in queries:
+            t0 = time.perf_counter(); index.similar(q); times.append((time.perf_counter() - t0) * 1000)
+        times.sort(); runs.append((times[len(times) // 2], times[int(len(times) * 0.99)]))
+    p50, p99 = sorted(runs)[len(runs) // 2]
+    found = sum(any(names[j] == names[i] for j, _ in index.similar(q)) for i, q in zip(targets, queries))
+    print(f"{len(names)} names, {len(queries)} queries: p50 {p50:.3f} ms, p99 {p99:.3f} ms, "
+          f"typo recall {found / len(targets):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""HTTP/1.1 vs HTTP/2 throughput against a local stub server.
+
+Starts a cleartext stub on 127.0.0.1 that speaks HTTP/1.1 (h11) and HTTP/2 with
+prior knowledge (h2), answers every GET with a small JSON:API body after a fixed
+delay (standing in for Planning Center's latency), and fires N concurrent GETs
+through an httpx client configured like the app's (same connection-pool cap).
+
+    python bench/http2_bench.py [--delay-ms 20] [--max-connections 20]
+"""
+import argparse, asyncio, json, time
+
+import h11
+import h2.config, h2.connection, h2.events
+import httpx
+
+BODY = json.dumps({"data": [{"type": "ServiceType", "id": str(i), "attributes": {"name": f"Service {i}", "sequence": i}}
+                            for i in range(25)]}).encode()
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+
+async def _serve_h1(reader, writer, first: bytes, delay: float):
+    conn = h11.Connection(h11.SERVER); conn.receive_data(first)
+    while True:
+        event = conn.next_event()
+        if event is h11.NEED_DATA:
+            data = await reader.read(65536)
+            if not data: break
+            conn.receive_data(data); continue
+        if isinstance(event, h11.Request):
+            await asyncio.sleep(delay)
+            writer.write(conn.send(h11.Response(status_code=200, headers=[("content-type", "application/json"),
+                                                                          ("content-length", str(len(BODY)))])))
+            writer.write(conn.send(h11.Data(data=BODY))); writer.write(conn.send(h11.EndOfMessage()))
+            await writer.drain()
+        elif isinstance(event, h11.EndOfMessage):
+            conn.start_next_cycle()
+        elif event is h11.PAUSED:
+            conn.start_next_cycle()
+        elif isinstance(event, h11.ConnectionClosed):
+            break
+    writer.close()
+
+
+async def _serve_h2(reader, writer, first: bytes, delay: float):
+    conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+    conn.initiate_connection(); writer.write(conn.data_to_send())
+    lock = asyncio.Lock()
+
+    async def respond(stream_id: int):
+        await asyncio.sleep(delay)
+        async with lock:
+            conn.send_headers(stream_id, [(":status", "200"), ("content-type", "application/json"),
+                                          ("content-length", str(len(BODY)))])
+            conn.send_data(stream_id, BODY, end_stream=True)
+            writer.write(conn.data_to_send())
+        await writer.drain()
+
+    data = first
+    while data:
+        async with lock:
+            events = conn.receive_data(data)
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    asyncio.ensure_future(respond(event.stream_id))
+            writer.write(conn.data_to_send())
+        await writer.drain()
+        data = await reader.read(65536)
+    writer.close()
+
+
+async def start_stub(delay: float):
+    async def handle(reader, writer):
+        first = await reader.read(65536)
+        if first.startswith(H2_PREFACE[:len(first)]) and len(first) < len(H2_PREFACE):
+            first += await reader.readexactly(len(H2_PREFACE) - len(first))
+        serve = _serve_h2 if first.startswith(H2_PREFACE) else _serve_h1
+        try:
+            await serve(reader, writer, first, delay)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def run(url: str, http2: bool, concurrency: int, total: int, max_connections: int) -> dict:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(http1=not http2, http2=http2, limits=limits, timeout=60) as client:
+        await client.get(url)  # warm the pool / complete the h2 handshake
+        sem = asyncio.Semaphore(concurrency); latencies = []
+
+        async def one():
+            async with sem:
+                t0 = time.perf_counter(); r = await client.get(url); r.json()
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {"rps": total / elapsed, "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000}
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delay-ms", type=float, default=20.0)
+    ap.add_argument("--max-connections", type=int, default=20)
+    ap.add_argument("--requests-per-level", type=int, default=2000)
+    args = ap.parse_args()
+    server, port = await start_stub(args.delay_ms / 1000)
+    url = f"http://127.0.0.1:{port}/services/v2/service_types"
+    print(f"stub delay={args.delay_ms}ms max_connections={args.max_connections}")
+    print(f"{'concurrency':>11} {'proto':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    async with server:
+        for concurrency in (10, 100, 500):
+            total = max(args.requests_per_level, concurrency * 4)
+            for http2 in (False, True):
+                res = await run(url, http2, concurrency, total, args.max_connections)
+                print(f"{concurrency:>11} {'HTTP/2' if http2 else 'HTTP/1.1':>8} {res['rps']:>10.0f} "
+                      f"{res['p50_ms']:>9.1f} {res['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""JSON:API decoding: the old hand-written included loops vs jsonapi.Document and Sparse.
+
+Builds a services_plans-shaped compound document (100 plans, 2,000 included resources:
+plan times, needed positions and team members) and times turning it into our plan dicts.
+The walk rows give both sides the same input, so they show the walk's cost alone: over parsed
+dicts (Document, the fallback when msgspec is missing) and over Sparse's structs (what the routes
+use; the index is rebuilt on every run). Neither is meant as a speedup over the hand-written loop,
+only as no slower. "route path" is services_plans' whole decode: the saving there comes from
+Sparse parsing only the declared fields, not from the walk.
+
+    python bench/jsonapi_bench.py [--plans 100] [--included 2000]
+"""
+import argparse, json, os, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+import codec  # noqa: E402
+from jsonapi import Document, _SparseDocument  # noqa: E402
+
+
+def build_payload(plans: int, included: int) -> dict:
+    per_plan = max(included // plans, 3); n = 0; data = []; inc = []
+    shape = (("PlanTime", "plan_times", 2), ("NeededPosition", "needed_positions", 3),
+             ("PlanPerson", "team_members", per_plan - 5))
+    for p in range(plans):
+        rels = {}
+        for type_, name, count in shape:
+            refs = []
+            for _ in range(max(count, 0)):
+                n += 1; refs.append({"type": type_, "id": str(n)})
+                inc.append({"type": type_, "id": str(n), "links": {"self": f"https://api.example/{type_}/{n}"},
+                            "attributes": {"starts_at": "2024-06-02T09:00:00Z", "ends_at": "2024-06-02T10:30:00Z",
+                                           "name": "Morning", "team_position_name": "Drums", "quantity": 1,
+                                           "assigned_count": 0, "status": "C", "notes": None},
+                            "relationships": {"person": {"data": {"type": "Person", "id": str(n % 300)}}}})
+            rels[name] = {"data": refs, "links": {}}
+        data.append({"type": "Plan", "id": str(p), "links": {},
+                     "attributes": {"title": f"Plan {p}", "series_title": "Series", "sort_date": "2024-06-02", "dates": "June 2"},
+                     "relationships": rels})
+    return {"data": data, "included": inc, "meta": {"total_count": plans}}
+
+
+def hand_written(data: dict) -> list:
+    """services_plans' loop before jsonapi.Document (f-string "type:id" index and .get() chains)."""
+    included = {f"{i.get('type')}:{i.get('id')}": i for i in data.get("included", [])} if data.get("included") else {}
+    plans_out = []
+    for item in data.get("data", []):
+        attrs = item.get("attributes", {}); rel = item.get("relationships", {})
+        times, needed_positions = [], []
+        if rel.get("plan_times", {}).get("data"):
+            for ref in rel["plan_times"]["data"]:
+                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); tattrs = (inc.get("attributes") or {}) if inc else {}
+                times.append({"starts_at": tattrs.get("starts_at"), "ends_at": tattrs.get("ends_at"), "name": tattrs.get("name")})
+        if rel.get("needed_positions", {}).get("data"):
+            for ref in rel["needed_positions"]["data"]:
+                inc = included.get(f"{ref.get('type')}:{ref.get('id')}"); nattrs = (inc.get("attributes") or {}) if inc else {}
+                needed_positions.append({"team_position_name": nattrs.get("team_position_name"),
+                                         "quantity": nattrs.get("quantity"), "assigned_count": nattrs.get("assigned_count")})
+        plans_out.append({"id": item.get("id"), "dates": attrs.get("sort_date") or attrs.get("dates"),
+                          "title": attrs.get("title"), "series_title": attrs.get("series_title"),
+                          "times": times, "needed_positions": needed_positions})
+    return plans_out
+
+
+def decoded(doc: Document) -> list:
+    out = []
+    for item in doc.data:
+        attrs = item.get("attributes") or {}
+        out.append({"id": item.get("id"), "dates": attrs.get("sort_date") or attrs.get("dates"),
+                    "title": attrs.get("title"), "series_title": attrs.get("series_title"),
+                    "times": doc.related_attributes(item, "plan_times", app._PLAN_TIME),
+                    "needed_positions": doc.related_attributes(item, "needed_positions", app._NEEDED_POSITION)})
+    return out
+
+
+def best_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=15)) / number * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plans", type=int, default=100)
+    ap.add_argument("--included", type=int, default=2000)
+    args = ap.parse_args()
+    payload = build_payload(args.plans, args.included); raw = json.dumps(payload).encode()
+    assert decoded(Document(payload)) == decoded(app._PLANS.decode(raw)) == hand_written(payload)
+    print(f"{args.plans} plans, {len(payload['included'])} included, {len(raw) / 1024:.0f} KiB")
+    structs = app._PLANS._decoder.decode(raw)  # parsed once; each run wraps it in a fresh (unindexed) document
+    print(f"{'':>18} {'baseline':>20} {'us':>7} {'new':>20} {'us':>7} {'ratio':>8}")
+    for label, old_name, old, new_name, new, number in (
+            ("walk dicts", "hand-written", lambda: hand_written(payload), "Document", lambda: decoded(Document(payload)), 50),
+            ("walk structs", "hand-written", lambda: hand_written(payload),
+             "Sparse structs", lambda: decoded(_SparseDocument(structs)), 50),
+            ("route path", "loads + hand-written", lambda: hand_written(codec.loads(raw)),
+             "_PLANS.decode + walk", lambda: decoded(app._PLANS.decode(raw)), 5)):
+        o, n = best_us(old, number), best_us(new, number)
+        print(f"{label:>18} {old_name:>20} {o:>7.0f} {new_name:>20} {n:>7.0f} {o / n:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
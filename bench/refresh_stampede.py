@@ -0,0 +1,118 @@
+"""Stress check for single-flight token refresh at the expiry boundary.
+
+Starts a local fake token endpoint that (like PCO) rotates the refresh token and
+rejects an already-used one, stores a token that is inside the 60s refresh window,
+then fires N concurrent get_valid_access_token() calls. Every caller must get the
+same new access token from exactly one refresh call.
+
+    python bench/refresh_stampede.py [--requests 500] [--instances 1]
+
+--instances > 1 runs the callers in separate processes (separate in-process
+single-flight tables), so only the Redis lock keeps them from refreshing in
+parallel; that mode needs a real REDIS_URL. A single instance falls back to
+fakeredis when REDIS_URL is unset and fakeredis is installed.
+"""
+import argparse, asyncio, json, os, sys, time
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import uvicorn  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+import app  # noqa: E402
+
+
+class FakeTokenEndpoint:
+    def __init__(self, latency: float):
+        self.latency = latency; self.calls = 0; self.valid_refresh = "r0"; self.generation = 0
+
+    async def token(self, request):
+        self.calls += 1
+        form = parse_qs((await request.body()).decode())
+        await asyncio.sleep(self.latency)
+        if form.get("refresh_token", [None])[0] != self.valid_refresh:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        self.generation += 1; self.valid_refresh = f"r{self.generation}"
+        return JSONResponse({"access_token": f"a{self.generation}", "refresh_token": self.valid_refresh, "expires_in": 7200})
+
+
+async def _connect_redis():
+    if os.getenv("REDIS_URL"):
+        import redis.asyncio as redis
+        return redis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit("Set REDIS_URL or pip install fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True, max_connections=10_000)
+
+
+async def fire(tenant: str, n: int) -> list:
+    results = await asyncio.gather(*(app.get_valid_access_token(tenant) for _ in range(n)), return_exceptions=True)
+    return [r if isinstance(r, str) else f"error: {r!r}" for r in results]
+
+
+async def worker(args):
+    app.TOKEN_URL = args.token_url
+    app.redis_client = await _connect_redis()
+    print(json.dumps(await fire(args.tenant, args.requests)))
+
+
+async def main(args):
+    endpoint = FakeTokenEndpoint(args.token_latency_ms / 1000)
+    server = uvicorn.Server(uvicorn.Config(Starlette(routes=[Route("/oauth/token", endpoint.token, methods=["POST"])]),
+                                           host="127.0.0.1", port=0, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started: await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    token_url = f"http://127.0.0.1:{port}/oauth/token"
+
+    if args.instances > 1 and not os.getenv("REDIS_URL"):
+        sys.exit("--instances > 1 needs a shared REDIS_URL")
+    app.TOKEN_URL = token_url
+    app.redis_client = await _connect_redis()
+    tenant = f"stampede-{os.getpid()}"
+    await app.redis_client.set(f"pco:{tenant}:token", json.dumps(
+        {"access_token": "a0", "refresh_token": "r0", "expires_at": time.time() + 30}))
+
+    t0 = time.perf_counter()
+    if args.instances == 1:
+        results = await fire(tenant, args.requests)
+    else:
+        per = args.requests // args.instances
+        procs = [await asyncio.create_subprocess_exec(sys.executable, __file__, "--worker", "--tenant", tenant,
+                                                      "--token-url", token_url, "--requests", str(per),
+                                                      stdout=asyncio.subprocess.PIPE) for _ in range(args.instances)]
+        results = []
+        for p in procs:
+            out, _ = await p.communicate(); results.extend(json.loads(out))
+    elapsed = time.perf_counter() - t0
+
+    errors = [r for r in results if r.startswith("error")]
+    tokens = sorted({r for r in results if not r.startswith("error")})
+    stored = json.loads(await app.redis_client.get(f"pco:{tenant}:token"))
+    print(f"requests={len(results)} instances={args.instances} elapsed={elapsed * 1000:.0f}ms")
+    print(f"token endpoint calls={endpoint.calls} distinct tokens={tokens} errors={len(errors)}")
+    print(f"stored refresh_token={stored['refresh_token']} (endpoint expects {endpoint.valid_refresh})")
+    await app.redis_client.delete(f"pco:{tenant}:token", f"pco:{tenant}:refresh:fence", f"pco:{tenant}:refresh:lock")
+    server.should_exit = True; await serve
+    ok = endpoint.calls == 1 and tokens == ["a1"] and not errors and stored["refresh_token"] == endpoint.valid_refresh
+    print("PASS" if ok else "FAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--instances", type=int, default=1)
+    ap.add_argument("--token-latency-ms", type=float, default=150.0)
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--tenant", help=argparse.SUPPRESS)
+    ap.add_argument("--token-url", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.worker:
+        asyncio.run(worker(args))
+    else:
+        sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,94 @@
+"""Per-request overhead of tenant routing as the tenant count grows.
+
+Registers N tenants (token + API key each) in Redis, then drives
+/pco/people/find through the ASGI app with a random tenant's X-API-Key per
+request. Planning Center is replaced by an in-memory transport, so the numbers
+are our own overhead: tenant resolution, token lookup, rate limiting, routing.
+
+The find_person response cache holds PCO_PEOPLE_FIND_CACHE_MAX entries in process (2000 by
+default); past that many tenants, lookups fall through to Redis or upstream, which is cache
+capacity rather than per-tenant overhead, and the warm-up pass over 10k tenants outlasts the 30 s
+PCO_PEOPLE_FIND_TTL. The `find hit` column shows how many were served from memory; pass
+--find-cache-max and --find-ttl to size the cache for the tenant count and compare.
+
+Uses REDIS_URL when set; otherwise falls back to fakeredis if it is installed.
+
+    python bench/tenant_overhead.py [--tenants 1,100,1000,10000] [--requests 2000] [--find-cache-max 20000] [--find-ttl 3600]
+"""
+import argparse, asyncio, json, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import httpx  # noqa: E402
+
+import app  # noqa: E402
+
+PEOPLE = {"data": [{"type": "Person", "id": "1", "attributes": {"name": "Ada Lovelace", "first_name": "Ada", "last_name": "Lovelace"},
+                    "relationships": {"emails": {"data": []}, "phone_numbers": {"data": []}}}], "included": []}
+
+
+async def _connect_redis():
+    if os.getenv("REDIS_URL"):
+        import redis.asyncio as redis
+        return redis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit("Set REDIS_URL or pip install fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True, max_connections=10_000)
+
+
+async def register(n: int) -> list:
+    keys = []; pipe = app.redis_client.pipeline(transaction=False)
+    for i in range(n):
+        tenant = f"bench-{i}"; api_key = f"key-{i}-{os.getpid()}"
+        pipe.set(f"pco:{tenant}:token", json.dumps({"access_token": f"tok-{i}", "expires_at": time.time() + 7200}))
+        pipe.set(f"pco:apikey:{app._api_key_digest(api_key)}", tenant)
+        keys.append(api_key)
+        if len(pipe) >= 2000: await pipe.execute()
+    await pipe.execute()
+    return keys
+
+
+async def measure(client: httpx.AsyncClient, keys: list, concurrency: int) -> list:
+    sem = asyncio.Semaphore(concurrency); latencies = []
+
+    async def one(api_key: str):
+        async with sem:
+            t0 = time.perf_counter()
+            r = await client.get("/pco/people/find", params={"name": "ada"}, headers={"X-API-Key": api_key})
+            latencies.append(time.perf_counter() - t0)
+            assert r.status_code == 200, r.text
+
+    await asyncio.gather(*(one(k) for k in keys))
+    return sorted(latencies)
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tenants", default="1,100,1000,10000")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--find-cache-max", type=int, default=app.PCO_PEOPLE_FIND_CACHE_MAX)
+    ap.add_argument("--find-ttl", type=float, default=app.PCO_PEOPLE_FIND_TTL)
+    args = ap.parse_args()
+
+    app.MULTI_TENANT = True
+    app.PCO_RATE_LIMIT_DEFAULT = 10**9  # the bench measures overhead, not pacing
+    app.PCO_PEOPLE_FIND_CACHE_MAX = args.find_cache_max; app.PCO_PEOPLE_FIND_TTL = args.find_ttl
+    app.redis_client = await _connect_redis()
+    app.http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda req: httpx.Response(200, json=PEOPLE)))
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="https://bench")
+
+    print(f"{'tenants':>8} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'find hit':>9}")
+    for n in (int(x) for x in args.tenants.split(",")):
+        keys = await register(n)
+        await measure(client, keys, args.concurrency)  # one request per tenant warms its caches
+        hits = app.people_find_counters["hits"]
+        lat = await measure(client, random.choices(keys, k=args.requests), args.concurrency)
+        hit = (app.people_find_counters["hits"] - hits) / len(lat)
+        print(f"{n:>8} {sum(lat) / len(lat) * 1000:>8.2f} {lat[len(lat) // 2] * 1000:>8.2f} {lat[int(len(lat) * 0.99) - 1] * 1000:>8.2f} {hit:>9.0%}")
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
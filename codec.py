@@ -0,0 +1,33 @@
+"""JSON encoding/decoding, with orjson when it is installed and the stdlib json module otherwise.
+
+    payload = loads(r.content)
+    return FastJSONResponse({"count": 1, "plans": plans})
+
+Endpoints that return a FastJSONResponse themselves skip FastAPI's jsonable_encoder pass; the
+content must already be plain JSON types (dict, list, str, int, float, bool, None).
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def loads(data) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None: return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,184 @@
+"""Decoding of JSON:API compound documents (Planning Center responses with `included`).
+
+    doc = Document(r.json())
+    for plan in doc.data:
+        times = doc.related_attributes(plan, "plan_times", PLAN_TIME)
+
+Included resources are indexed once, on first use, and each reference resolves with a single
+dict lookup: no per-reference string building and no .get() chains in the callers. Sparse.decode
+goes further and reads the body straight into msgspec structs holding only the fields a route uses.
+"""
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import codec
+
+try:
+    import msgspec
+except ImportError:  # optional: without it Sparse.decode parses the whole document
+    msgspec = None
+
+_type_id = itemgetter("type", "id")
+_struct_type_id = attrgetter("type", "id")
+_EMPTY: dict = {}
+
+
+class Document:
+    """A parsed JSON:API document: `data` (always a list) and `included`, resolvable by (type, id)."""
+    __slots__ = ("data", "included", "meta", "links", "_index")
+
+    def __init__(self, payload: dict):
+        data = payload.get("data")
+        self.data = data if isinstance(data, list) else ([data] if data else [])
+        self.included = payload.get("included") or []
+        self.meta = payload.get("meta") or {}; self.links = payload.get("links") or {}
+        self._index: Optional[dict] = None
+
+    def _resources(self) -> dict:
+        if self._index is None: self._index = dict(zip(map(_type_id, self.included), self.included))
+        return self._index
+
+    def get(self, type_: str, id_: str) -> Optional[dict]:
+        return self._resources().get((type_, id_))
+
+    def related(self, resource: dict, name: str) -> List[dict]:
+        """The included resources behind resource's `name` relationship; unresolvable references are skipped."""
+        index = self._resources()
+        return [r for r in (index.get(_type_id(ref)) for ref in _refs(resource, name)) if r is not None]
+
+    def related_attributes(self, resource: dict, name: str, project: Optional[Callable[[dict], Any]] = None) -> list:
+        """Attributes of each referenced resource in reference order ({} when missing from `included`),
+        passed through project when given."""
+        get = self._resources().get; out = []
+        for ref in _refs(resource, name):
+            r = get((ref["type"], ref["id"]))
+            attrs = (r.get("attributes") or _EMPTY) if r is not None else _EMPTY
+            out.append(attrs if project is None else project(attrs))
+        return out
+
+
+class _SparseDocument(Document):
+    """A Document over Sparse's decoded structs: the same API, resolved by attribute access.
+    related_attributes still hands out (and projects) plain dicts."""
+    __slots__ = ()
+
+    def _resources(self) -> dict:
+        if self._index is None: self._index = dict(zip(map(_struct_type_id, self.included), self.included))
+        return self._index
+
+    def related(self, resource, name: str) -> list:
+        index = self._resources()
+        return [r for r in (index.get((ref.type, ref.id)) for ref in _struct_refs(resource, name)) if r is not None]
+
+    def related_attributes(self, resource, name: str, project: Optional[Callable[[dict], Any]] = None) -> list:
+        get = self._resources().get; out = []
+        pairs = getattr(project, "pairs", None)
+        if pairs is not None:
+            # A projection reads the struct's fields directly: no intermediate attributes dict
+            for ref in _struct_refs(resource, name):
+                r = get((ref.type, ref.id)); attrs = r.attributes if r is not None else None
+                row = {}
+                for key, src in pairs: row[key] = getattr(attrs, src, None)
+                out.append(row)
+            return out
+        asdict = msgspec.structs.asdict
+        for ref in _struct_refs(resource, name):
+            r = get((ref.type, ref.id))
+            attrs = _EMPTY if r is None or r.attributes is None else asdict(r.attributes)
+            out.append(attrs if project is None else project(attrs))
+        return out
+
+
+def _struct_refs(resource, name: str) -> list:
+    rel = getattr(resource.relationships, name, None)
+    refs = rel.data if rel is not None else None
+    if not refs: return []
+    return refs if refs.__class__ is list else [refs]
+
+
+def _refs(resource: dict, name: str) -> list:
+    try:
+        refs = resource["relationships"][name]["data"]
+    except (KeyError, TypeError):
+        return []
+    if not refs: return []
+    return [refs] if refs.__class__ is dict else refs
+
+
+def projection(*fields: str, **renamed: str) -> Callable[[dict], dict]:
+    """A function mapping an attributes dict to {field: value} (None when absent).
+
+    renamed maps output keys to source attributes.
+    """
+    pairs = tuple((f, f) for f in fields) + tuple(renamed.items())
+
+    def project(attrs: dict) -> dict:
+        # A plain loop: one frame per call where a lambda around a dict comprehension costs two
+        out = {}; get = attrs.get
+        for key, src in pairs: out[key] = get(src)
+        return out
+    project.pairs = pairs  # lets _SparseDocument read the fields straight off its structs
+    return project
+
+
+class Sparse:
+    """The slice of a JSON:API document a route reads: some attributes of the primary resources
+    and, per relationship, the related type and the attributes read from it.
+
+        PLANS = Sparse("Plan", ("title", "sort_date"), plan_times=("PlanTime", ("starts_at", "ends_at")))
+        params.update(PLANS.fieldsets(include="plan_times"))  # PCO sends only those attributes
+        doc = PLANS.decode(r.content)                          # and only those are decoded
+
+    With msgspec installed, decode() reads the body into generated structs, so undeclared
+    attributes, links and relationships are skipped by the parser instead of becoming Python
+    objects; without it (or if the body doesn't fit the schema) it falls back to a full parse.
+    The structs answer .get(key) and [key] like the parsed dicts (unset fields read as missing).
+    """
+
+    def __init__(self, type_: str, attributes, **related):
+        self.type = type_; self.attributes = tuple(attributes); self.related = related
+        self._decoder = self._build_decoder() if msgspec is not None else None
+
+    def fieldsets(self, include: str = "") -> Dict[str, str]:
+        """`fields[Type]` params for this slice; `include` paths stay in the primary fieldset so they still link."""
+        linked = [*self.related, *(path.split(".")[0] for path in include.split(",") if path)]
+        out = {f"fields[{self.type}]": ",".join(dict.fromkeys([*self.attributes, *linked]))}
+        for type_, attributes in self.related.values():
+            key = f"fields[{type_}]"; merged = out.get(key, "").split(",") + list(attributes)
+            out[key] = ",".join(dict.fromkeys(a for a in merged if a))
+        return out
+
+    def decode(self, raw: bytes) -> "Document":
+        if self._decoder is not None:
+            try: return _SparseDocument(self._decoder.decode(raw))
+            except msgspec.DecodeError: pass  # unexpected shape: parse it all rather than fail
+        return Document(codec.loads(raw))
+
+    def _build_decoder(self):
+        def struct(name, fields):
+            return msgspec.defstruct(name, [(f, t, None) for f, t in fields], bases=(_Fields,), gc=False)
+        ref = struct("Ref", [("type", str), ("id", str)])
+        rel = struct("Rel", [("data", Union[List[ref], ref, None])])
+        attrs = struct(f"{self.type}Attributes", [(a, Any) for a in self.attributes])
+        rels = struct(f"{self.type}Relationships", [(name, Optional[rel]) for name in self.related])
+        primary = struct(self.type, [("type", str), ("id", str), ("attributes", Optional[attrs]), ("relationships", Optional[rels])])
+        included_attrs = struct("IncludedAttributes", [(a, Any) for a in dict.fromkeys(
+            a for _, names in self.related.values() for a in names)])
+        included = struct("Included", [("type", str), ("id", str), ("attributes", Optional[included_attrs])])
+        document = struct("Document", [("data", Union[List[primary], primary, None]), ("included", Optional[List[included]]),
+                                       ("meta", Optional[Dict[str, Any]]), ("links", Optional[Dict[str, Any]])])
+        return msgspec.json.Decoder(document)
+
+
+if msgspec is not None:
+    class _Fields(msgspec.Struct, gc=False):
+        """Base of Sparse's structs: read like the dicts a full parse gives, an unset (None) field as missing."""
+
+        def get(self, key: str, default=None):
+            value = getattr(self, key, None)
+            return default if value is None else value
+
+        def __getitem__(self, key: str):
+            value = getattr(self, key, None)
+            if value is None: raise KeyError(key)
+            return value
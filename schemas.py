@@ -0,0 +1,73 @@
+"""Shapes of the /pco/* responses.
+
+Used as response_model so the OpenAPI spec (and GPT Actions) describe them; the endpoints return
+FastJSONResponse directly, so nothing is validated or re-encoded per request.
+"""
+from typing import List, Optional
+
+from typing_extensions import NotRequired, TypedDict  # pydantic needs typing_extensions' TypedDict before 3.12
+
+
+class Person(TypedDict):
+    id: str
+    name: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    emails: List[str]
+    phones: List[str]
+
+
+class PeopleResult(TypedDict):
+    count: int
+    people: List[Person]
+    source: NotRequired[str]
+
+
+class ServiceType(TypedDict):
+    id: str
+    name: Optional[str]
+    folder_name: Optional[str]
+    sequence: Optional[int]
+
+
+class ServiceTypeMatch(ServiceType):
+    match: str
+    score: float
+
+
+class ServiceTypesResult(TypedDict):
+    count: int
+    service_types: List[ServiceType]
+
+
+class ServiceTypeMatches(TypedDict):
+    query: str
+    matches: List[ServiceTypeMatch]
+    count: int
+
+
+class PlanTime(TypedDict):
+    starts_at: Optional[str]
+    ends_at: Optional[str]
+    name: Optional[str]
+
+
+class NeededPosition(TypedDict):
+    team_position_name: Optional[str]
+    quantity: Optional[int]
+    assigned_count: Optional[int]
+
+
+class Plan(TypedDict):
+    id: str
+    dates: Optional[str]
+    title: Optional[str]
+    series_title: Optional[str]
+    times: List[PlanTime]
+    needed_positions: List[NeededPosition]
+
+
+class PlansResult(TypedDict):
+    count: int
+    plans: List[Plan]
+    service_type: NotRequired[ServiceTypeMatch]